@@ -1,9 +1,14 @@
 # adaptive_survey11_stable.py
-import spacy
-import psycopg2
+import os
+import db_pool
 import time 
 import random
 from collections import Counter
+import keyword_index
+import perf_metrics
+from query_analyzer import QueryAnalyzer
+from response_journal import ResponseJournal
+from search_cache import SearchCache, normalize_keywords
 
 # --- Icebreaker List for Post and Ghost Feature ---
 ICEBREAKERS = [
@@ -55,148 +60,286 @@ CHECK_IN_QUESTIONS = [
 ]
 
 
+# Bill ranking backends for find_relevant_bills:
+#   keywords - exact lemma match on bill_keywords (mmap index when published)
+#   fulltext - ts_rank_cd over the weighted bill_search tsvector (GIN index)
+#   blend    - relevance_score sums + fulltext_weight * ts_rank_cd
+SEARCH_MODES = ('keywords', 'fulltext', 'blend')
+
+KEYWORD_RANKING_SQL = """
+    SELECT bk.bill_number, COUNT(*) as match_count,
+           SUM(bk.relevance_score) as total_relevance
+    FROM bill_keywords bk
+    WHERE bk.keyword = ANY(%(keywords)s)
+    GROUP BY bk.bill_number
+    ORDER BY total_relevance DESC, match_count DESC
+    LIMIT 6
+"""
+
+# ts_rank_cd normalization 32 maps the rank into [0, 1) so it blends with keyword sums.
+BLENDED_RANKING_SQL = """
+    WITH keyword_scores AS (
+        SELECT bk.bill_number, COUNT(*) as match_count,
+               SUM(bk.relevance_score) as keyword_relevance
+        FROM bill_keywords bk
+        WHERE bk.keyword = ANY(%(keywords)s)
+        GROUP BY bk.bill_number
+    ),
+    text_scores AS (
+        SELECT bs.bill_number, ts_rank_cd(bs.document, query, 32) as text_rank
+        FROM bill_search bs, websearch_to_tsquery('english', %(text_query)s) query
+        WHERE bs.document @@ query
+        ORDER BY text_rank DESC
+        LIMIT 50
+    )
+    SELECT COALESCE(k.bill_number, t.bill_number) as bill_number,
+           COALESCE(k.match_count, 0) as match_count,
+           COALESCE(k.keyword_relevance, 0) + %(text_weight)s * COALESCE(t.text_rank, 0) as total_relevance
+    FROM keyword_scores k
+    FULL OUTER JOIN text_scores t ON t.bill_number = k.bill_number
+    ORDER BY total_relevance DESC, match_count DESC
+    LIMIT 6
+"""
+
+
+def to_websearch_query(keywords):
+    """OR together the extracted keywords; multi-word entities become quoted phrases."""
+    terms = []
+    for keyword in dict.fromkeys(keywords):
+        keyword = keyword.replace('"', '').strip()
+        if keyword:
+            terms.append(f'"{keyword}"' if ' ' in keyword else keyword)
+    return ' or '.join(terms)
+
+
 class AdaptiveSurveyV11:
-    def __init__(self):
-        self.nlp = spacy.load("en_core_web_sm")
-        self.db_conn = psycopg2.connect(
-            dbname="openparliament",
-            user="dan", 
-            password="senatai2025",
-            host="localhost"
-        )
+    def __init__(self, search_mode=None, fulltext_weight=1.0, input_func=input, journal_path=None):
+        # Query-analysis mode: trimmed pipeline (no parser) plus a word -> lemma/POS LRU
+        self.query_analyzer = QueryAnalyzer()
+        self.nlp = self.query_analyzer.nlp
+        self.db_conn = db_pool.checkout()
+        # Answers are journaled locally and written to senatair_responses in batches
+        self.response_journal = ResponseJournal(db_pool.transaction, path=journal_path)
+        # Shared memory-mapped keyword index, opened lazily (see the keyword_index property)
+        self._keyword_index = keyword_index.LazyIndex()
+        # Ranking backend (see SEARCH_MODES) and the weight given to ts_rank_cd when blending
+        self.search_mode = search_mode or os.environ.get('SENATAI_SEARCH_MODE', 'keywords')
+        if self.search_mode not in SEARCH_MODES:
+            raise ValueError(f"search_mode must be one of {SEARCH_MODES}, got {self.search_mode!r}")
+        self.fulltext_weight = fulltext_weight
+        # Normalized-query result cache, dropped whenever search_data_version moves
+        self.search_cache = SearchCache(version_source=self.get_search_data_version)
+        # Every prompt goes through input_func, so scripted drivers (survey_benchmark.py) can run headless
+        self.input_func = input_func
         # Tracks total questions answered in the current session
         self.questions_answered_session = 0 
         
     def __del__(self):
-        if self.db_conn:
-            self.db_conn.close()
+        if getattr(self, 'response_journal', None):
+            self.response_journal.close()
+        if getattr(self, 'db_conn', None):
+            db_pool.release(self.db_conn)
+            self.db_conn = None
+
+    @property
+    def keyword_index(self):
+        """The shared KeywordIndex, or None until keyword_index.py has published one."""
+        return self._keyword_index.get()
+
+    # Columns and joins shared by every bill hydration query. The sponsor name and the
+    # first bills_billtext row are resolved in the same statement instead of one extra
+    # round trip per bill.
+    BILL_DETAILS_SELECT = """
+        b.number, b.short_title_en, bt.summary_en, bt.text_en,
+        b.introduced, sponsor.name_en
+    """
+    BILL_DETAILS_JOINS = """
+        LEFT JOIN LATERAL (
+            SELECT summary_en, text_en
+            FROM bills_billtext
+            WHERE bill_id = b.id
+            LIMIT 1
+        ) bt ON TRUE
+        LEFT JOIN politicians_politician sponsor ON sponsor.id = b.sponsor_politician_id
+    """
+
+    def _build_bill_details(self, row):
+        """Turns a row selected with BILL_DETAILS_SELECT into the bill dict used by the survey."""
+        number, short_title, summary, full_text, introduced_date, sponsor_name = row[:6]
+
+        bill_url = f"https://openparliament.ca/bills/{number}/"
+        excerpt = summary or (full_text[:170] + "...") if full_text else "No excerpt available."
+
+        return {
+            'number': number,
+            'title': short_title or "Untitled Bill",
+            'summary': summary,
+            'excerpt': excerpt,
+            'full_text': full_text,
+            'introduced_date': introduced_date,
+            'sponsor': sponsor_name or "Unknown",
+            'url': bill_url
+        }
 
-    # 🔑 FIX: Corrected variable unpacking and added ROLLBACK
     def get_bill_details(self, bill_number):
         """Get full bill details including text excerpts with defensive rollback."""
+        bills = self.get_bills_details([bill_number])
+        return bills[0] if bills else None
+
+    def get_bills_details(self, bill_numbers):
+        """
+        Batched hydration: fetches details and sponsor names for every bill number
+        in ONE query. Results come back in the same order as bill_numbers.
+        """
+        if not bill_numbers:
+            return []
+
         cursor = None
         try:
             cursor = self.db_conn.cursor()
-            
-            # 1. Main bill fetch
-            cursor.execute("""
-                SELECT b.number, b.short_title_en, bt.summary_en, bt.text_en,
-                       b.introduced, b.sponsor_politician_id
-                FROM bills_bill b
-                LEFT JOIN bills_billtext bt ON b.id = bt.bill_id
-                WHERE b.number = %s
-            """, (bill_number,))
-            
-            result = cursor.fetchone()
-            
-            if not result: 
-                return None
-            
-            # CRITICAL FIX: Unpack in the same order as the SQL SELECT statement.
-            number, short_title, summary, full_text, introduced_date, sponsor_id = result[:6] 
-
-            # 2. Get sponsor name (Lookup in the correct 'politicians' table)
-            sponsor = "Unknown"
-            if sponsor_id:
-                try:
-                    # Assuming the table to find the politician's name is 'politicians_politician'
-                    cursor.execute("SELECT name_en FROM politicians_politician WHERE id = %s", (sponsor_id,))
-                    sponsor_result = cursor.fetchone()
-                    sponsor = sponsor_result[0] if sponsor_result else "Unknown"
-                except Exception:
-                    # Ignore sponsor lookup failure, but keep the transaction clear
-                    sponsor = "Unknown (Lookup Failed)"
-            
-            bill_url = f"https://openparliament.ca/bills/{number}/"
-            excerpt = summary or (full_text[:170] + "...") if full_text else "No excerpt available."
-
-            return {
-                'number': number,
-                'title': short_title or "Untitled Bill",
-                'summary': summary,
-                'excerpt': excerpt,
-                'full_text': full_text,
-                'introduced_date': introduced_date,
-                'sponsor': sponsor,
-                'url': bill_url
-            }
-        
+            cursor.execute(f"""
+                SELECT {self.BILL_DETAILS_SELECT}
+                FROM unnest(%s::text[]) WITH ORDINALITY AS wanted(number, list_position)
+                JOIN bills_bill b ON b.number = wanted.number
+                {self.BILL_DETAILS_JOINS}
+                ORDER BY wanted.list_position
+            """, (list(bill_numbers),))
+
+            return [self._build_bill_details(row) for row in cursor.fetchall()]
+
         except Exception as e:
             # CRITICAL: If any database error occurs, we MUST rollback to clear the aborted transaction state
             self.db_conn.rollback()
             raise e # Re-raise the exception to the main thread for visibility
-        
+
         finally:
             if cursor:
                 cursor.close()
 
-    # 🔑 FIX: Added defensive ROLLBACK
     def get_interest_count(self, bill_number):
         """Fetches the total count of distinct sessions this bill has been presented to *any* user."""
+        return self.get_interest_counts([bill_number]).get(bill_number, 0)
+
+    # 🔑 FIX: Added defensive ROLLBACK
+    def get_interest_counts(self, bill_numbers):
+        """
+        Batch lookup of Senatai interest for every bill in bill_numbers.
+        Reads the maintained bill_interest counters (one indexed row per bill),
+        so the cost does not grow with the size of senatair_responses.
+        Returns {bill_number: count}; bills nobody has answered are left out.
+        """
+        if not bill_numbers:
+            return {}
+
         cursor = None
         try:
             cursor = self.db_conn.cursor()
             cursor.execute("""
-                SELECT COUNT(DISTINCT senatair_id, session_id) 
-                FROM senatair_responses
-                WHERE bill_number = %s;
-            """, (bill_number,))
-            count = cursor.fetchone()[0]
-            return count
+                SELECT bill_number, interest_count
+                FROM bill_interest
+                WHERE bill_number = ANY(%s);
+            """, (list(bill_numbers),))
+            return dict(cursor.fetchall())
         except Exception:
-            self.db_conn.rollback() # ADDED: Ensure rollback on failure
-            return 0
+            self.db_conn.rollback() # Ensure rollback on failure
+            return {}
+        finally:
+            if cursor:
+                cursor.close()
+
+    def get_search_data_version(self):
+        """
+        Version of everything search results depend on: the bill_keywords / bill text
+        change counters plus the published keyword index file. None if unavailable.
+        """
+        cursor = None
+        try:
+            cursor = self.db_conn.cursor()
+            cursor.execute("SELECT COALESCE(SUM(version), 0) FROM search_data_version;")
+            index = self.keyword_index
+            index_version = index.version if index else None
+            return (cursor.fetchone()[0], index_version)
+        except Exception:
+            self.db_conn.rollback()
+            return None
         finally:
             if cursor:
                 cursor.close()
 
-    # 🔑 FIX: Added defensive ROLLBACK
     def find_relevant_bills(self, user_input):
         """Find bills relevant to user input using keyword matching"""
-        doc = self.nlp(user_input.lower())
-        keywords = []
-        for token in doc:
-            if (token.pos_ in ['NOUN', 'PROPN', 'ADJ'] and 
-                not token.is_stop and 
-                len(token.text) > 3):
-                keywords.append(token.lemma_.lower())
-        for ent in doc.ents:
-            if ent.label_ in ['ORG', 'GPE', 'PERSON', 'LAW']:
-                keywords.append(ent.text.lower())
+        with perf_metrics.stage('nlp'):
+            keywords = self.query_analyzer.extract_keywords(user_input)
         
         if not keywords: return [], []
 
+        cache_key = (self.search_mode, normalize_keywords(keywords))
+        bills = self.search_cache.get(cache_key)
+        if bills is None:
+            with perf_metrics.stage(f'search ({self.search_mode})'):
+                bills = self._search_bills(keywords)
+            if bills is None:
+                return [], []
+            self.search_cache.put(cache_key, bills)
+
+        # Copies, so callers can annotate bills without touching cached entries
+        return [dict(bill) for bill in bills], keywords
+
+    # 🔑 FIX: Added defensive ROLLBACK
+    def _search_bills(self, keywords):
+        """Ranks and hydrates bills for the extracted keywords. Returns None on database errors."""
         cursor = None
         try:
+            index = self.keyword_index
+            if index and self.search_mode == 'keywords':
+                # Rank in-process against the mapped index, then hydrate in one query
+                with perf_metrics.stage('ranking (keyword index)'):
+                    ranked = index.top_k(keywords, 6)
+                with perf_metrics.stage('hydration'):
+                    bills = self.get_bills_details([bill_number for bill_number, _, _ in ranked])
+                scores = {bill_number: (match_count, relevance) for bill_number, match_count, relevance in ranked}
+                for bill_details in bills:
+                    bill_details['match_count'], bill_details['relevance'] = scores[bill_details['number']]
+                return bills
+
+            if self.search_mode == 'keywords':
+                ranking_sql = KEYWORD_RANKING_SQL
+                params = {'keywords': keywords}
+            else:
+                ranking_sql = BLENDED_RANKING_SQL
+                params = {
+                    'keywords': keywords if self.search_mode == 'blend' else [],
+                    'text_query': to_websearch_query(keywords),
+                    'text_weight': self.fulltext_weight
+                }
+
             cursor = self.db_conn.cursor()
-            query = """
-                SELECT DISTINCT bk.bill_number, COUNT(*) as match_count,
-                               SUM(bk.relevance_score) as total_relevance
-                FROM bill_keywords bk
-                WHERE bk.keyword = ANY(%s)
-                GROUP BY bk.bill_number
-                ORDER BY total_relevance DESC, match_count DESC
-                LIMIT 6
+            # Ranking and hydration in a single round trip: the CTE picks the top 6 bills,
+            # the outer query attaches text and sponsor name in relevance order.
+            query = f"""
+                WITH ranked AS ({ranking_sql})
+                SELECT {self.BILL_DETAILS_SELECT}, ranked.match_count, ranked.total_relevance
+                FROM ranked
+                JOIN bills_bill b ON b.number = ranked.bill_number
+                {self.BILL_DETAILS_JOINS}
+                ORDER BY ranked.total_relevance DESC, ranked.match_count DESC
             """
             
-            cursor.execute(query, (keywords,))
-            results = cursor.fetchall()
+            cursor.execute(query, params)
             
             bills = []
-            for bill_number, match_count, relevance in results:
-                # This calls the fixed get_bill_details()
-                bill_details = self.get_bill_details(bill_number) 
-                if bill_details:
-                    bill_details['match_count'] = match_count
-                    bill_details['relevance'] = relevance
-                    bills.append(bill_details)
+            for row in cursor.fetchall():
+                bill_details = self._build_bill_details(row)
+                bill_details['match_count'] = row[6]
+                bill_details['relevance'] = row[7]
+                bills.append(bill_details)
             
-            return bills, keywords
+            return bills
         
         except Exception as e:
             self.db_conn.rollback() # CRITICAL: Rollback if the main keyword search query fails
             # We don't re-raise here so the program can continue, but the main loop catches it anyway
-            return [], []
+            return None
         
         finally:
             if cursor:
@@ -206,8 +349,11 @@ class AdaptiveSurveyV11:
         """Clean display of relevant bills with proper links, including Senatai Interest Count."""
         print(f"\n📚 Found {len(bills)} relevant laws:")
         
+        with perf_metrics.stage('interest counts'):
+            interest_counts = self.get_interest_counts([bill['number'] for bill in bills])
+        
         for i, bill in enumerate(bills, 1):
-            interest_count = self.get_interest_count(bill['number'])
+            interest_count = interest_counts.get(bill['number'], 0)
             interest_note = f" (🔥 Senatai Interest: {interest_count} Posts)" if interest_count > 0 else ""
             
             print(f"\n\t {i}. 📋 {bill['number']}: {bill['title']}{interest_note}")
@@ -241,34 +387,28 @@ class AdaptiveSurveyV11:
         return questions[:2]
         
     def save_response(self, user_id, session_id, question, answer_score, bill_number, bill_keywords):
-        """Saves a single user response to the senatair_responses table."""
-        cursor = self.db_conn.cursor()
+        """
+        Records a single user response. The answer is fsynced to the local response
+        journal right away and reaches senatair_responses in the next batched flush.
+        """
+        is_meta = question.get('is_meta', False)
         
         try:
-            is_meta = question.get('is_meta', False)
-            
-            cursor.execute("""
-                INSERT INTO senatair_responses 
-                (senatair_id, session_id, question_text, answer_text, bill_number, question_type, matched_keywords, is_meta, created_at) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s);
-            """, (
-                user_id,
-                session_id,
-                question['text'],
-                question['options'][int(answer_score)-1],  # Store the text of the answer
-                bill_number if not is_meta else None, 
-                question['type'],
-                ", ".join(bill_keywords) if bill_keywords else None,
-                is_meta,
-                time.strftime('%Y-%m-%d %H:%M:%S')
-            ))
-            self.db_conn.commit()
+            with perf_metrics.stage('save_response'):
+                self.response_journal.append({
+                    'senatair_id': user_id,
+                    'session_id': session_id,
+                    'question_text': question['text'],
+                    'answer_text': question['options'][int(answer_score)-1],  # Store the text of the answer
+                    'bill_number': bill_number if not is_meta else None,
+                    'question_type': question['type'],
+                    'keywords': list(bill_keywords) if bill_keywords else None,
+                    'is_meta': is_meta,
+                    'created_at': time.strftime('%Y-%m-%d %H:%M:%S')
+                })
             return True
-        except psycopg2.Error as e:
-            self.db_conn.rollback() # Ensure rollback on failure
+        except OSError:
             return False
-        finally:
-            cursor.close()
 
     # --- NEW: Relevance Check Function ---
     def relevance_check_prompt(self, bills):
@@ -290,7 +430,7 @@ class AdaptiveSurveyV11:
             print(f"\t [B] - Skip the questions and return to the main prompt.")
             print(f"\t [quit] - Exit the application.")
             
-            selection = input("Your choice (Bill Number/A/B/quit): ").strip().upper()
+            selection = self.input_func("Your choice (Bill Number/A/B/quit): ").strip().upper()
             
             if selection == 'QUIT':
                 return None # Signal a program exit
@@ -321,7 +461,7 @@ class AdaptiveSurveyV11:
             print("To turn your opinions into **Policap**—your share of political power and data revenue—you need to sign up for a free Senatai Co-op account.")
             print("\nWould you like to register or sign in now? (yes/no): ")
             
-            response = input("> ").strip().lower()
+            response = self.input_func("> ").strip().lower()
             if response == 'yes':
                 print("💻 Launching registration interface... (In a real app, this would open a web browser).")
                 return True 
@@ -346,7 +486,7 @@ class AdaptiveSurveyV11:
                 print(f"    {j}. {option.split('=')[-1].strip()}")
             
             while True:
-                response = input("\nYour choice (1-5 or 'skip' or 'quit'): ").strip().lower()
+                response = self.input_func("\nYour choice (1-5 or 'skip' or 'quit'): ").strip().lower()
                 
                 if response == 'quit':
                     print("\n👋 Exiting survey...")
@@ -369,13 +509,23 @@ class AdaptiveSurveyV11:
                     print("❌ Please enter 1-5, 'skip', or 'quit'")
         return False # Do not exit
 
-    def run_survey(self):
+    def run_survey(self, user_id=1, session_id=None):
+        try:
+            self._survey_loop(user_id, session_id)
+        finally:
+            # Session end or 'quit': push every journaled answer to the database
+            self.response_journal.flush()
+            stats = self.search_cache.stats()
+            print(f"🗂️  Search cache: {stats['hits']} hits / {stats['misses']} misses "
+                  f"({stats['hit_rate']:.0%}), {stats['size']}/{stats['maxsize']} entries")
+
+    def _survey_loop(self, user_id, session_id):
         print("🚀 Starting Adaptive Survey V11")
         print("💡 Featuring Relevance Check, Senatai Check-in, Registration Prompt, and Graceful Exit!")
         
         # --- Test Environment Setup ---
-        TEST_USER_ID = 1 # Using User ID 1 for testing (represents ANONYMOUS)
-        TEST_SESSION_ID = int(time.time()) 
+        TEST_USER_ID = user_id # User ID 1 (the default) represents ANONYMOUS
+        TEST_SESSION_ID = session_id or int(time.time())
         print(f"👤 Using Test User ID: {TEST_USER_ID} | Session: {TEST_SESSION_ID}")
         print("---------------------------------")
         print("⏸️ Type 'quit' at any time to exit\n")
@@ -392,7 +542,7 @@ class AdaptiveSurveyV11:
             print("═══════════════════════════════════════")
             print(f"🗳️  {current_icebreaker}")
             print("───────────────────────────────────────")
-            user_input = input("\n> ").strip()
+            user_input = self.input_func("\n> ").strip()
             
             if user_input.lower() == 'quit':
                 break
@@ -427,11 +577,12 @@ class AdaptiveSurveyV11:
             
             # 3. Generate all survey questions for the selected bills
             all_questions = []
-            for bill in bills_for_questions:
-                questions = self.generate_engaging_questions(bill)
-                for q in questions:
-                    q['bill'] = bill
-                    all_questions.append(q)
+            with perf_metrics.stage('question generation'):
+                for bill in bills_for_questions:
+                    questions = self.generate_engaging_questions(bill)
+                    for q in questions:
+                        q['bill'] = bill
+                        all_questions.append(q)
             
             random.shuffle(all_questions)
             
@@ -453,7 +604,7 @@ class AdaptiveSurveyV11:
                 
                 while True:
                     # Graceful Exit FIX is inside this inner loop
-                    response = input("\nYour choice (1-5 or 'skip' or 'quit'): ").strip().lower() 
+                    response = self.input_func("\nYour choice (1-5 or 'skip' or 'quit'): ").strip().lower() 
                     
                     if response == 'quit':
                         print("\n👋 Exiting survey...")
@@ -1,6 +1,8 @@
 # batch_keyword_extractor3.py
+# Run from the repository root so db_pool is importable:
+#   PYTHONPATH=. python archive/batch_keyword_extractor3.py
 import spacy
-import psycopg2
+import db_pool
 from collections import Counter
 import time
 import sys
@@ -9,18 +11,7 @@ import signal
 class BatchExtractorV3:
     def __init__(self):
         self.nlp = spacy.load("en_core_web_sm")
-        self.source_conn = psycopg2.connect(
-            dbname="openparliament",
-            user="dan",
-            password="senatai2025",
-            host="localhost"
-        )
-        self.target_conn = psycopg2.connect(
-            dbname="openparliament", 
-            user="dan",
-            password="senatai2025",
-            host="localhost"
-        )
+        self.source_conn = db_pool.checkout()
         self.processed_count = 0
         self.running = True
         
@@ -147,36 +138,28 @@ class BatchExtractorV3:
         success_count = 0
         for keyword_data in keywords:
             try:
-                # Create new connection for each keyword to avoid transaction issues
-                conn = psycopg2.connect(
-                    dbname="openparliament",
-                    user="dan",
-                    password="senatai2025", 
-                    host="localhost"
-                )
-                cur = conn.cursor()
-                
-                cur.execute("""
-                    INSERT INTO bill_keywords 
-                    (bill_id, bill_number, keyword, keyword_type, frequency, relevance_score)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (bill_id, keyword, keyword_type) 
-                    DO UPDATE SET frequency = EXCLUDED.frequency,
-                                  relevance_score = EXCLUDED.relevance_score
-                """, (
-                    keyword_data['bill_id'],
-                    keyword_data['bill_number'], 
-                    keyword_data['keyword'],
-                    keyword_data['type'],
-                    keyword_data['frequency'],
-                    keyword_data['relevance']
-                ))
-                
-                conn.commit()
+                # Own transaction per keyword (pooled connection) to avoid transaction issues
+                with db_pool.transaction() as conn:
+                    cur = conn.cursor()
+                    cur.execute("""
+                        INSERT INTO bill_keywords
+                        (bill_id, bill_number, keyword, keyword_type, frequency, relevance_score)
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                        ON CONFLICT (bill_id, keyword, keyword_type)
+                        DO UPDATE SET frequency = EXCLUDED.frequency,
+                                      relevance_score = EXCLUDED.relevance_score
+                    """, (
+                        keyword_data['bill_id'],
+                        keyword_data['bill_number'],
+                        keyword_data['keyword'],
+                        keyword_data['type'],
+                        keyword_data['frequency'],
+                        keyword_data['relevance']
+                    ))
+                    cur.close()
+
                 success_count += 1
-                cur.close()
-                conn.close()
-                
+
             except Exception as e:
                 print(f"⚠️  Skipped keyword '{keyword_data['keyword']}': {e}")
                 continue
@@ -259,8 +242,7 @@ class BatchExtractorV3:
                 time.sleep(30)
     
     def close(self):
-        self.source_conn.close()
-        self.target_conn.close()
+        db_pool.release(self.source_conn)
 
 if __name__ == "__main__":
     extractor = BatchExtractorV3()
@@ -0,0 +1,220 @@
+# batch_predictions.py
+"""
+Population-scale PersonalizedPredictor job: predicts every (senatair, active bill)
+pair and bulk-loads the results into vote_predictions.
+
+    python batch_predictions.py                 # only users whose responses changed
+    python batch_predictions.py --full          # recompute everybody
+    python batch_predictions.py --processes 8 --chunk-size 250 --all-bills
+
+How it works:
+  * Changed users are found by comparing MAX(senatair_keyword_sentiment.last_updated)
+    per user with prediction_user_state.source_updated_at (see database_schema_template.sql).
+  * Users are split into chunks and handed to a process pool. Each worker builds the
+    bill x keyword matrix once (bill_keyword_matrix.py) and scores a user's bills in one
+    vectorized pass.
+  * Each chunk replaces its users' rows for this module in one transaction:
+    DELETE, COPY the new rows, then upsert prediction_user_state.
+
+Only bills sharing at least one keyword with the user get a row. Bills with no
+matching sentiment data would all be the same neutral guess.
+"""
+import argparse
+import csv
+import io
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import psycopg2.extras
+
+MODULE_NAME = 'PersonalizedPredictor v3'
+MODULE_DESCRIPTION = 'Keyword-sentiment weighted average over past survey answers (personalized_predictor3.py)'
+MODULE_VERSION = '3.0'
+
+# Keyword evidence (summed response counts) at which confidence reaches half its maximum
+EVIDENCE_HALF_WEIGHT = 5.0
+
+
+def votes_and_confidence(scores, weights):
+    """
+    Vectorized mapping of 1-5 stance scores to vote_predictions values.
+
+    predicted_vote follows stance_label(): Yes (Likely Support), No (Likely Oppose),
+    Abstain (Neutral/Uncertain). confidence (0-100) grows with the distance from the
+    neutral 3.0 and with the amount of keyword evidence behind the score.
+    """
+    votes = np.where(scores >= 3.5, 'Yes', np.where(scores < 2.5, 'No', 'Abstain'))
+    strength = np.clip(np.abs(scores - 3.0) / 2.0, 0.0, 1.0)
+    evidence = weights / (weights + EVIDENCE_HALF_WEIGHT)
+    return votes, np.round(100.0 * strength * evidence, 2)
+
+
+def find_users_to_predict(conn, module_name, full=False):
+    """Returns [(senatair_id, source_updated_at)] for users needing new predictions."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT s.senatair_id, MAX(s.last_updated) as source_updated_at
+            FROM senatair_keyword_sentiment s
+            LEFT JOIN prediction_user_state p
+                   ON p.senatair_id = s.senatair_id AND p.module_name = %s
+            GROUP BY s.senatair_id, p.source_updated_at
+            HAVING %s OR p.source_updated_at IS NULL OR MAX(s.last_updated) > p.source_updated_at
+            ORDER BY s.senatair_id
+        """, (module_name, full))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def fetch_active_bills(conn, all_bills=False):
+    """Bill numbers to predict: bills that are not law yet (or every bill)."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT number FROM bills_bill
+            WHERE number IS NOT NULL AND (%s OR NOT COALESCE(law, FALSE))
+        """, (all_bills,))
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def register_module(conn, module_name):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO predictor_modules (module_name, module_description, version)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (module_name) DO NOTHING
+        """, (module_name, MODULE_DESCRIPTION, MODULE_VERSION))
+    finally:
+        cursor.close()
+
+
+# --- Worker process state (set once per process by _init_worker) ---
+_matrix = None
+_active_mask = None
+_module_name = None
+
+
+def _init_worker(active_bill_numbers, module_name):
+    global _matrix, _active_mask, _module_name
+    import bill_keyword_matrix
+    import db_pool
+
+    with db_pool.connection() as conn:
+        _matrix = bill_keyword_matrix.get_matrix(conn)
+    active = set(active_bill_numbers)
+    _active_mask = np.array([number in active for number in _matrix.bill_numbers], dtype=bool)
+    _module_name = module_name
+
+
+def _load_sentiments(conn, user_ids):
+    """{senatair_id: {'keyword': [count, score_sum]}} for a chunk of users, in one query."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT senatair_id, keyword, response_count, score_sum
+            FROM senatair_keyword_sentiment
+            WHERE senatair_id = ANY(%s)
+        """, (list(user_ids),))
+        sentiments = {user_id: {} for user_id in user_ids}
+        for user_id, keyword, count, score_sum in cursor.fetchall():
+            sentiments[user_id][keyword] = [count, score_sum]
+        return sentiments
+    finally:
+        cursor.close()
+
+
+def predict_chunk(users):
+    """
+    Worker: predicts and stores one chunk of (senatair_id, source_updated_at) pairs.
+    Returns (users_processed, predictions_written).
+    """
+    import db_pool
+
+    user_ids = [user_id for user_id, _ in users]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    counts = {}
+
+    with db_pool.connection() as conn:
+        sentiments = _load_sentiments(conn, user_ids)
+
+    for user_id in user_ids:
+        scores, weights = _matrix.stance_scores(sentiments[user_id])
+        selected = np.flatnonzero(_active_mask & (weights > 0))
+        votes, confidences = votes_and_confidence(scores[selected], weights[selected])
+        for bill_idx, vote, confidence in zip(selected, votes, confidences):
+            writer.writerow((user_id, _matrix.bill_numbers[bill_idx], vote, f"{confidence:.2f}", _module_name))
+        counts[user_id] = len(selected)
+
+    buffer.seek(0)
+    with db_pool.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            DELETE FROM vote_predictions
+            WHERE module_name = %s AND senatair_id = ANY(%s)
+        """, (_module_name, user_ids))
+        cursor.copy_expert("""
+            COPY vote_predictions (senatair_id, bill_number, predicted_vote, confidence, module_name)
+            FROM STDIN WITH (FORMAT csv)
+        """, buffer)
+        psycopg2.extras.execute_values(cursor, """
+            INSERT INTO prediction_user_state (senatair_id, module_name, source_updated_at, prediction_count)
+            VALUES %s
+            ON CONFLICT (senatair_id, module_name) DO UPDATE
+            SET source_updated_at = EXCLUDED.source_updated_at,
+                prediction_count = EXCLUDED.prediction_count,
+                predicted_at = CURRENT_TIMESTAMP
+        """, [(user_id, _module_name, updated_at, counts[user_id]) for user_id, updated_at in users])
+        cursor.close()
+
+    return len(users), sum(counts.values())
+
+
+def run_batch(processes=None, chunk_size=500, full=False, all_bills=False, module_name=MODULE_NAME):
+    import db_pool
+
+    started = time.time()
+    with db_pool.transaction() as conn:
+        register_module(conn, module_name)
+        users = find_users_to_predict(conn, module_name, full)
+        active_bills = fetch_active_bills(conn, all_bills)
+    db_pool.close_pool()  # Workers open their own connections
+
+    if not users:
+        print("✅ No users with new responses since the last run. Nothing to predict.")
+        return 0, 0
+
+    chunks = [users[i:i + chunk_size] for i in range(0, len(users), chunk_size)]
+    processes = processes or os.cpu_count() or 1
+    print(f"🧠 Predicting {len(users)} users x {len(active_bills)} active bills "
+          f"({len(chunks)} chunks, {processes} processes)...")
+
+    users_done = predictions = 0
+    # spawn: workers must not inherit the parent's database sockets
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes, initializer=_init_worker, initargs=(active_bills, module_name)) as pool:
+        for chunk_users, chunk_predictions in pool.imap_unordered(predict_chunk, chunks):
+            users_done += chunk_users
+            predictions += chunk_predictions
+            print(f"   💾 {users_done}/{len(users)} users, {predictions} predictions written")
+
+    elapsed = time.time() - started
+    print(f"✅ Done in {elapsed:.1f}s ({users_done / elapsed if elapsed else 0:.0f} users/s)")
+    return users_done, predictions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch PersonalizedPredictor predictions into vote_predictions")
+    parser.add_argument('--processes', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=500, help="users per worker task (default 500)")
+    parser.add_argument('--full', action='store_true', help="recompute every user, not only changed ones")
+    parser.add_argument('--all-bills', action='store_true', help="include bills that are already law")
+    args = parser.parse_args()
+
+    run_batch(args.processes, args.chunk_size, args.full, args.all_bills)
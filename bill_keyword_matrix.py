@@ -0,0 +1,143 @@
+# bill_keyword_matrix.py
+"""
+Sparse bill x keyword weight matrix for scoring every bill in one pass.
+
+Entry (keyword, bill) is the number of bill_keywords rows the bill has for
+that keyword, i.e. how often the keyword appears in the bill's keyword
+list. PersonalizedPredictor.predict_bill_stance weights each listed keyword
+by the user's response count, so for all bills at once:
+
+    weight[b] = sum_k M[k, b] * count[k]
+    score[b]  = sum_k M[k, b] * score_sum[k] / weight[b]
+
+Both sums are sparse matrix-vector products, done with numpy.bincount
+over the postings. The matrix is stored keyword-major in CSR form, the
+same layout as the shared keyword index. When data/keyword_index.bin is
+published its postings are used as-is; otherwise the matrix is built from
+bill_keywords once per process.
+"""
+import threading
+
+import numpy as np
+
+import keyword_index
+
+
+class BillKeywordMatrix:
+    def __init__(self, term_lookup, bill_numbers, indptr, posting_bills, posting_weights):
+        """
+        Args:
+            term_lookup: callable keyword -> row index, or -1 if unknown
+            bill_numbers: bill number of each column
+            indptr: int array, CSR row pointer (len = n_terms + 1)
+            posting_bills: int array, column (bill index) of each posting
+            posting_weights: float array, keyword multiplicity of each posting
+        """
+        self.term_lookup = term_lookup
+        self.bill_numbers = list(bill_numbers)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.posting_bills = np.asarray(posting_bills, dtype=np.int64)
+        self.posting_weights = np.asarray(posting_weights, dtype=np.float64)
+        # Row of every posting, so a dense keyword vector can be broadcast onto the postings
+        self.posting_terms = np.repeat(np.arange(len(self.indptr) - 1), np.diff(self.indptr))
+
+    @property
+    def n_bills(self):
+        return len(self.bill_numbers)
+
+    @property
+    def n_terms(self):
+        return len(self.indptr) - 1
+
+    @classmethod
+    def from_rows(cls, rows):
+        """rows: iterable of (keyword, bill_number, multiplicity)."""
+        by_term = {}
+        bill_ids = {}
+        for keyword, bill_number, multiplicity in rows:
+            if not keyword or not bill_number:
+                continue
+            bill_idx = bill_ids.setdefault(bill_number, len(bill_ids))
+            postings = by_term.setdefault(keyword, {})
+            postings[bill_idx] = postings.get(bill_idx, 0) + int(multiplicity or 1)
+
+        terms = sorted(by_term)
+        term_ids = {term: i for i, term in enumerate(terms)}
+        indptr, posting_bills, posting_weights = [0], [], []
+        for term in terms:
+            for bill_idx, multiplicity in sorted(by_term[term].items()):
+                posting_bills.append(bill_idx)
+                posting_weights.append(multiplicity)
+            indptr.append(len(posting_bills))
+
+        bill_numbers = sorted(bill_ids, key=bill_ids.get)
+        return cls(lambda keyword: term_ids.get(keyword, -1), bill_numbers, indptr, posting_bills, posting_weights)
+
+    @classmethod
+    def from_db(cls, conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT keyword, bill_number, COUNT(*)
+                FROM bill_keywords
+                WHERE keyword IS NOT NULL AND bill_number IS NOT NULL
+                GROUP BY keyword, bill_number
+            """)
+            return cls.from_rows(cursor.fetchall())
+        finally:
+            cursor.close()
+
+    @classmethod
+    def from_keyword_index(cls, index):
+        """Wraps a published keyword index (posting_counts are the multiplicities) without copying postings."""
+        mapped = index._index
+        bill_numbers = [mapped.bill_number(i) for i in range(mapped.n_bills)]
+        return cls(
+            mapped.term_id,
+            bill_numbers,
+            np.frombuffer(mapped.posting_ptr, dtype=np.uint32),
+            np.frombuffer(mapped.posting_bills, dtype=np.uint32),
+            np.frombuffer(mapped.posting_counts, dtype=np.uint32)
+        )
+
+    def user_vectors(self, keyword_sentiment):
+        """Dense (score_sum, count) vectors over the matrix vocabulary from {'keyword': [count, score_sum]}."""
+        score_sums = np.zeros(self.n_terms)
+        counts = np.zeros(self.n_terms)
+        for keyword, (count, score_sum) in keyword_sentiment.items():
+            if count < 1:
+                continue
+            term = self.term_lookup(keyword)
+            if term >= 0:
+                score_sums[term] = score_sum
+                counts[term] = count
+        return score_sums, counts
+
+    def stance_scores(self, keyword_sentiment):
+        """
+        Returns (scores, weights) arrays over all bills. Bills sharing no keyword
+        with the user get weight 0 and the neutral score 3.0.
+        """
+        score_sums, counts = self.user_vectors(keyword_sentiment)
+        numerators = np.bincount(self.posting_bills, self.posting_weights * score_sums[self.posting_terms],
+                                 minlength=self.n_bills)
+        weights = np.bincount(self.posting_bills, self.posting_weights * counts[self.posting_terms],
+                              minlength=self.n_bills)
+        scores = np.full(self.n_bills, 3.0)
+        np.divide(numerators, weights, out=scores, where=weights > 0)
+        return scores, weights
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def get_matrix(conn):
+    """Process-wide matrix: the published keyword index if available, else built from bill_keywords."""
+    global _matrix
+    if _matrix is None:
+        with _matrix_lock:
+            if _matrix is None:
+                index = keyword_index.open_index()
+                _matrix = BillKeywordMatrix.from_keyword_index(index) if index else BillKeywordMatrix.from_db(conn)
+    return _matrix
@@ -1,12 +1,7 @@
 # check_schema.py
-import psycopg2
+import db_pool
 
-conn = psycopg2.connect(
-    dbname="openparliament",
-    user="postgres",
-    password="senatai2025", 
-    host="localhost"
-)
+conn = db_pool.checkout()
 cur = conn.cursor()
 
 # Check bills_billtext columns
@@ -26,4 +21,4 @@ cur.execute("""
 print("bills_bill columns:", [row[0] for row in cur.fetchall()])
 
 cur.close()
-conn.close()
+db_pool.release(conn)
@@ -74,6 +74,240 @@ CREATE TABLE IF NOT EXISTS senatair_responses (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Write-behind response journal: each journaled answer carries a unique id so crash replay is idempotent
+ALTER TABLE senatair_responses ADD COLUMN IF NOT EXISTS is_meta BOOLEAN DEFAULT FALSE;
+ALTER TABLE senatair_responses ADD COLUMN IF NOT EXISTS journal_id UUID;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_senatair_responses_journal_id ON senatair_responses(journal_id);
+
+-- Normalized response keywords: text[] with a GIN index, so "responses mentioning housing"
+-- is an index lookup (keywords @> ARRAY['housing']) instead of parsing matched_keywords.
+-- matched_keywords is kept only for legacy writers (adaptive_survey9/10).
+ALTER TABLE senatair_responses ADD COLUMN IF NOT EXISTS keywords TEXT[];
+
+-- "cost, living, high" -> {cost,living,high}; same rules the old Python split used
+CREATE OR REPLACE FUNCTION split_matched_keywords(matched TEXT) RETURNS TEXT[] AS $$
+    SELECT ARRAY(
+        SELECT btrim(raw.keyword, E' \t\r\n')
+        FROM unnest(string_to_array(matched, ',')) WITH ORDINALITY AS raw(keyword, position)
+        WHERE btrim(raw.keyword, E' \t\r\n') <> ''
+        ORDER BY raw.position
+    );
+$$ LANGUAGE SQL IMMUTABLE;
+
+-- Legacy writers still send the comma-joined string; derive the array for them
+CREATE OR REPLACE FUNCTION senatair_responses_fill_keywords() RETURNS trigger AS $$
+BEGIN
+    IF NEW.keywords IS NULL AND NEW.matched_keywords IS NOT NULL THEN
+        NEW.keywords := split_matched_keywords(NEW.matched_keywords);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS senatair_responses_fill_keywords ON senatair_responses;
+CREATE TRIGGER senatair_responses_fill_keywords
+    BEFORE INSERT ON senatair_responses
+    FOR EACH ROW EXECUTE FUNCTION senatair_responses_fill_keywords();
+
+-- Backfill existing rows (safe to re-run)
+UPDATE senatair_responses
+SET keywords = split_matched_keywords(matched_keywords)
+WHERE keywords IS NULL AND matched_keywords IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_senatair_responses_keywords ON senatair_responses USING GIN (keywords);
+
+-- Senatai interest counters (maintained by save_response in adaptive_survey11.py)
+-- One row per (senatair, session, bill): only the first answer counts as interest
+CREATE TABLE IF NOT EXISTS bill_interest_sessions (
+    bill_number VARCHAR(20) NOT NULL,
+    senatair_id INTEGER NOT NULL,
+    session_id INTEGER NOT NULL,
+    PRIMARY KEY (bill_number, senatair_id, session_id)
+);
+
+CREATE TABLE IF NOT EXISTS bill_interest (
+    bill_number VARCHAR(20) PRIMARY KEY,
+    interest_count INTEGER NOT NULL DEFAULT 0,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Backfill from existing responses (safe to re-run)
+INSERT INTO bill_interest_sessions (bill_number, senatair_id, session_id)
+SELECT DISTINCT bill_number, senatair_id, session_id
+FROM senatair_responses
+WHERE bill_number IS NOT NULL AND senatair_id IS NOT NULL AND session_id IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+INSERT INTO bill_interest (bill_number, interest_count)
+SELECT bill_number, COUNT(*) FROM bill_interest_sessions GROUP BY bill_number
+ON CONFLICT (bill_number) DO UPDATE SET interest_count = EXCLUDED.interest_count;
+
+-- Full-text bill search (used by adaptive_survey11.py in 'fulltext' / 'blend' search modes)
+-- Weighted document: title (A), summaries (B), bill text (C, first 100k chars keeps tsvector under its size limit)
+CREATE TABLE IF NOT EXISTS bill_search (
+    bill_id INTEGER PRIMARY KEY,
+    bill_number VARCHAR(20) NOT NULL,
+    document TSVECTOR NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bill_search_document ON bill_search USING GIN (document);
+CREATE INDEX IF NOT EXISTS idx_bill_search_bill_number ON bill_search(bill_number);
+
+-- Rebuilds one bill's document, or every bill when called with NULL
+CREATE OR REPLACE FUNCTION refresh_bill_search(target_bill_id INTEGER) RETURNS void AS $$
+    INSERT INTO bill_search (bill_id, bill_number, document)
+    SELECT b.id, b.number,
+           setweight(to_tsvector('english', COALESCE(b.short_title_en, '')), 'A') ||
+           setweight(to_tsvector('english', COALESCE(string_agg(bt.summary_en, ' '), '')), 'B') ||
+           setweight(to_tsvector('english', LEFT(COALESCE(string_agg(bt.text_en, ' '), ''), 100000)), 'C')
+    FROM bills_bill b
+    LEFT JOIN bills_billtext bt ON bt.bill_id = b.id
+    WHERE b.number IS NOT NULL
+      AND (target_bill_id IS NULL OR b.id = target_bill_id)
+    GROUP BY b.id, b.number
+    ON CONFLICT (bill_id) DO UPDATE
+    SET bill_number = EXCLUDED.bill_number, document = EXCLUDED.document;
+$$ LANGUAGE SQL;
+
+-- Keep documents in sync when bill titles or texts change
+CREATE OR REPLACE FUNCTION bill_search_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'bills_bill' THEN
+        PERFORM refresh_bill_search(NEW.id);
+    ELSE
+        PERFORM refresh_bill_search(NEW.bill_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bill_search_bill_sync ON bills_bill;
+CREATE TRIGGER bill_search_bill_sync
+    AFTER INSERT OR UPDATE OF number, short_title_en ON bills_bill
+    FOR EACH ROW EXECUTE FUNCTION bill_search_sync();
+
+DROP TRIGGER IF EXISTS bill_search_billtext_sync ON bills_billtext;
+CREATE TRIGGER bill_search_billtext_sync
+    AFTER INSERT OR UPDATE OF summary_en, text_en ON bills_billtext
+    FOR EACH ROW EXECUTE FUNCTION bill_search_sync();
+
+-- Initial build
+SELECT refresh_bill_search(NULL);
+
+-- Change counters for search caches: bumped once per statement that touches search data
+CREATE TABLE IF NOT EXISTS search_data_version (
+    source VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION bump_search_data_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO search_data_version (source, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (source) DO UPDATE SET version = search_data_version.version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bill_keywords_version ON bill_keywords;
+CREATE TRIGGER bill_keywords_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON bill_keywords
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_search_data_version();
+
+DROP TRIGGER IF EXISTS bills_bill_version ON bills_bill;
+CREATE TRIGGER bills_bill_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON bills_bill
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_search_data_version();
+
+DROP TRIGGER IF EXISTS bills_billtext_version ON bills_billtext;
+CREATE TRIGGER bills_billtext_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON bills_billtext
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_search_data_version();
+
+-- Per-senatair keyword sentiment (read by personalized_predictor3.py)
+-- Running (count, score sum) of scored answers ('1'-'5') per response keyword, so the
+-- predictor loads one row per distinct keyword instead of every past response.
+CREATE TABLE IF NOT EXISTS senatair_keyword_sentiment (
+    senatair_id INTEGER NOT NULL,
+    keyword TEXT NOT NULL,
+    response_count INTEGER NOT NULL DEFAULT 0,
+    score_sum BIGINT NOT NULL DEFAULT 0,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (senatair_id, keyword)
+);
+
+-- Incremental update: one aggregated upsert per INSERT statement (a whole journal batch).
+-- Rows skipped by ON CONFLICT DO NOTHING never reach the transition table, so replays don't double count.
+CREATE OR REPLACE FUNCTION senatair_keyword_sentiment_sync() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO senatair_keyword_sentiment (senatair_id, keyword, response_count, score_sum)
+    SELECT r.senatair_id, raw.keyword, COUNT(*), SUM(r.answer_text::INTEGER)
+    FROM new_responses r
+    CROSS JOIN LATERAL unnest(r.keywords) AS raw(keyword)
+    WHERE r.senatair_id IS NOT NULL
+      AND r.answer_text IN ('1', '2', '3', '4', '5')
+    GROUP BY r.senatair_id, raw.keyword
+    ON CONFLICT (senatair_id, keyword) DO UPDATE
+    SET response_count = senatair_keyword_sentiment.response_count + EXCLUDED.response_count,
+        score_sum = senatair_keyword_sentiment.score_sum + EXCLUDED.score_sum,
+        last_updated = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS senatair_keyword_sentiment_insert ON senatair_responses;
+CREATE TRIGGER senatair_keyword_sentiment_insert
+    AFTER INSERT ON senatair_responses
+    REFERENCING NEW TABLE AS new_responses
+    FOR EACH STATEMENT EXECUTE FUNCTION senatair_keyword_sentiment_sync();
+
+-- Backfill / full rebuild from existing responses (safe to re-run)
+INSERT INTO senatair_keyword_sentiment (senatair_id, keyword, response_count, score_sum)
+SELECT r.senatair_id, raw.keyword, COUNT(*), SUM(r.answer_text::INTEGER)
+FROM senatair_responses r
+CROSS JOIN LATERAL unnest(r.keywords) AS raw(keyword)
+WHERE r.senatair_id IS NOT NULL
+  AND r.answer_text IN ('1', '2', '3', '4', '5')
+GROUP BY r.senatair_id, raw.keyword
+ON CONFLICT (senatair_id, keyword) DO UPDATE
+SET response_count = EXCLUDED.response_count, score_sum = EXCLUDED.score_sum, last_updated = CURRENT_TIMESTAMP;
+
+-- Vote predictions (same definition as the persistent node's init_postgres_tables.sql)
+-- Filled by batch_predictions.py; pages and audits read them instead of predicting inline.
+CREATE TABLE IF NOT EXISTS vote_predictions (
+    id SERIAL PRIMARY KEY,
+    senatair_id INTEGER NOT NULL REFERENCES senatairs(id),
+    bill_number VARCHAR(20) NOT NULL,
+    predicted_vote VARCHAR(10) NOT NULL,
+    confidence DECIMAL(5,2),
+    module_name VARCHAR(100),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_vote_predictions_senatair_module ON vote_predictions(senatair_id, module_name);
+CREATE INDEX IF NOT EXISTS idx_vote_predictions_bill_module ON vote_predictions(bill_number, module_name);
+
+-- Vote predictor modules
+CREATE TABLE IF NOT EXISTS predictor_modules (
+    id SERIAL PRIMARY KEY,
+    module_name VARCHAR(100) UNIQUE NOT NULL,
+    module_description TEXT,
+    version VARCHAR(20),
+    rating DECIMAL(3,1) DEFAULT 0.0,
+    accuracy_history TEXT,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Per-user bookkeeping for batch_predictions.py: a user is recomputed only when their
+-- senatair_keyword_sentiment rows have changed since source_updated_at
+CREATE TABLE IF NOT EXISTS prediction_user_state (
+    senatair_id INTEGER NOT NULL,
+    module_name VARCHAR(100) NOT NULL,
+    source_updated_at TIMESTAMP NOT NULL,
+    prediction_count INTEGER NOT NULL DEFAULT 0,
+    predicted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (senatair_id, module_name)
+);
+CREATE INDEX IF NOT EXISTS idx_senatair_keyword_sentiment_updated ON senatair_keyword_sentiment(senatair_id, last_updated);
+
 -- Indexes for performance
 CREATE INDEX IF NOT EXISTS idx_bill_keywords_keyword ON bill_keywords(keyword);
 CREATE INDEX IF NOT EXISTS idx_bill_keywords_bill_number ON bill_keywords(bill_number);
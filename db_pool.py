@@ -0,0 +1,236 @@
+# db_pool.py
+"""
+Shared PostgreSQL connection pool for the Senatai CLI tools and scripts.
+
+Every entry point gets its connections from here instead of calling
+psycopg2.connect itself, so a process opens at most SENATAI_DB_POOL_MAX
+connections and reuses them.
+
+    with db_pool.transaction() as conn:      # commit on success, rollback on error
+        cur = conn.cursor()
+        ...
+
+    with db_pool.connection() as conn:       # plain checkout (read-only work)
+        ...
+
+    conn = db_pool.checkout()                # long-lived checkout (e.g. one survey run)
+    ...
+    db_pool.release(conn)
+
+Configuration (environment):
+    DATABASE_URL                  full DSN; wins over the POSTGRES_* settings
+    POSTGRES_DB / POSTGRES_USER / POSTGRES_PASSWORD / POSTGRES_HOST / POSTGRES_PORT
+    SENATAI_DB_POOL_MIN           connections opened up front (default 1)
+    SENATAI_DB_POOL_MAX           hard cap per process (default 5)
+    SENATAI_DB_HEALTH_CHECK       seconds a connection may sit idle before it is
+                                  re-checked with SELECT 1 on checkout (default 30)
+    SENATAI_DB_CHECKOUT_TIMEOUT   seconds to wait for a free connection when all
+                                  SENATAI_DB_POOL_MAX are in use (default 10)
+
+Separate short-lived processes cannot share an in-process pool; point
+DATABASE_URL at PgBouncer to share server connections across them.
+"""
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extras
+import psycopg2.pool
+
+import perf_metrics
+
+
+def get_db_config():
+    """Connection settings as keyword arguments for psycopg2.connect."""
+    database_url = os.environ.get('DATABASE_URL')
+    if database_url:
+        return {'dsn': database_url}
+    return {
+        'dbname': os.environ.get('POSTGRES_DB', 'openparliament'),
+        'user': os.environ.get('POSTGRES_USER', 'dan'),
+        'password': os.environ.get('POSTGRES_PASSWORD', 'senatai2025'),
+        'host': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'port': os.environ.get('POSTGRES_PORT', '5432')
+    }
+
+
+class SenataiPool:
+    """ThreadedConnectionPool with checkout health checks and idle tracking."""
+
+    def __init__(self, minconn=None, maxconn=None, health_check_after=None, checkout_timeout=None,
+                 **connect_kwargs):
+        self.minconn = int(minconn if minconn is not None else os.environ.get('SENATAI_DB_POOL_MIN', 1))
+        self.maxconn = int(maxconn if maxconn is not None else os.environ.get('SENATAI_DB_POOL_MAX', 5))
+        self.health_check_after = float(
+            health_check_after if health_check_after is not None
+            else os.environ.get('SENATAI_DB_HEALTH_CHECK', 30)
+        )
+        self.checkout_timeout = float(
+            checkout_timeout if checkout_timeout is not None
+            else os.environ.get('SENATAI_DB_CHECKOUT_TIMEOUT', 10)
+        )
+        # psycopg2's pool raises as soon as it is exhausted; callers wait here instead
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+        connect_kwargs = connect_kwargs or get_db_config()
+        if perf_metrics.enabled():
+            # Per-statement timings (SENATAI_METRICS); plain cursors otherwise
+            connect_kwargs.setdefault('cursor_factory', perf_metrics.TimedCursor)
+        self._pool = psycopg2.pool.ThreadedConnectionPool(self.minconn, self.maxconn, **connect_kwargs)
+        self._lock = threading.Lock()
+        self._returned_at = {}  # id(conn) -> monotonic time it went back to the pool
+        self._in_use = 0
+        # Saturation counters (see stats())
+        self._peak_in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._max_wait = 0.0
+        self._timeouts = 0
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        returned_at = self._returned_at.get(id(conn))
+        if returned_at is None or time.monotonic() - returned_at < self.health_check_after:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        """Checks out a live connection, replacing dead ones transparently."""
+        if not self._slots.acquire(blocking=False):
+            # Pool saturated: wait for a connection to come back and record how long it took
+            started = time.monotonic()
+            acquired = self._slots.acquire(timeout=self.checkout_timeout)
+            waited = time.monotonic() - started
+            with self._lock:
+                self._waits += 1
+                self._wait_seconds += waited
+                self._max_wait = max(self._max_wait, waited)
+                self._timeouts += not acquired
+            if not acquired:
+                raise psycopg2.pool.PoolError(
+                    f"No database connection free after {self.checkout_timeout:.0f}s (pool max {self.maxconn})"
+                )
+        try:
+            for _ in range(self.maxconn + 1):
+                conn = self._pool.getconn()
+                if self._healthy(conn):
+                    with self._lock:
+                        self._returned_at.pop(id(conn), None)
+                        self._in_use += 1
+                        self._checkouts += 1
+                        self._peak_in_use = max(self._peak_in_use, self._in_use)
+                    return conn
+                with self._lock:
+                    self._returned_at.pop(id(conn), None)
+                self._pool.putconn(conn, close=True)
+        except Exception:
+            self._slots.release()
+            raise
+        self._slots.release()
+        raise psycopg2.OperationalError("Could not get a healthy database connection from the pool")
+
+    def putconn(self, conn, close=False):
+        """Returns a connection; any transaction left open is rolled back first."""
+        if not conn.closed and not close:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                close = True
+        with self._lock:
+            self._in_use -= 1
+            if not close:
+                self._returned_at[id(conn)] = time.monotonic()
+        self._pool.putconn(conn, close=close or conn.closed)
+        self._slots.release()
+
+    def stats(self):
+        """Current use and saturation counters since the pool was created."""
+        with self._lock:
+            return {
+                'in_use': self._in_use,
+                'peak_in_use': self._peak_in_use,
+                'min': self.minconn,
+                'max': self.maxconn,
+                'utilization': self._in_use / self.maxconn,
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_ratio': self._waits / self._checkouts if self._checkouts else 0.0,
+                'avg_wait_ms': self._wait_seconds / self._waits * 1000 if self._waits else 0.0,
+                'max_wait_ms': self._max_wait * 1000,
+                'timeouts': self._timeouts
+            }
+
+    def closeall(self):
+        if not self._pool.closed:
+            self._pool.closeall()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process-wide pool, created on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SenataiPool()
+                atexit.register(close_pool)
+    return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+def checkout():
+    return get_pool().getconn()
+
+
+def release(conn, close=False):
+    if _pool is None:
+        # Pool already shut down (e.g. interpreter exit); just drop the connection
+        if not conn.closed:
+            conn.close()
+        return
+    _pool.putconn(conn, close=close)
+
+
+@contextmanager
+def connection():
+    """Pooled connection for the duration of the block; rolled back on return."""
+    conn = checkout()
+    try:
+        yield conn
+    finally:
+        release(conn)
+
+
+@contextmanager
+def transaction():
+    """Pooled connection wrapped in a transaction: COMMIT on success, ROLLBACK on error."""
+    conn = checkout()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release(conn)
@@ -0,0 +1,163 @@
+# complaint_worker.py
+"""
+Background post-processing for "Post and Ghost" complaints.
+
+/speak only stores the raw complaint and queues it in complaint_jobs
+(init_postgres_tables.sql). This worker claims queued complaints in batches
+with FOR UPDATE SKIP LOCKED, so any number of workers can run side by side
+without double-processing, and for each batch in one transaction:
+
+  * fills complaints.detected_topics / matched_bills / matched_categories
+  * bumps topic_interest with one multi-row upsert
+  * deletes the finished jobs
+
+A batch that fails is rolled back and retried with backoff; after
+MAX_ATTEMPTS its jobs stay in the table (with last_error) for inspection.
+Failures never stop the worker: it logs them, waits poll_interval and
+carries on (--once gives up after MAX_ATTEMPTS failures in a row).
+
+    python complaint_worker.py                  # run until interrupted
+    python complaint_worker.py --once           # drain the queue and exit
+    python complaint_worker.py --batch-size 200 --poll-interval 0.5
+"""
+import argparse
+import collections
+import time
+
+import psycopg2.extras
+
+import db_pool
+import topic_matcher
+
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF_SECONDS = 30
+CATEGORY_INDEX_MAX_AGE = 300
+
+
+class ComplaintWorker:
+    def __init__(self, batch_size=50):
+        self.batch_size = batch_size
+        self._category_index = None
+        self._category_index_built_at = 0.0
+
+    def category_index(self, cursor):
+        """Bill category index, rebuilt every CATEGORY_INDEX_MAX_AGE seconds."""
+        if self._category_index is None or time.monotonic() - self._category_index_built_at > CATEGORY_INDEX_MAX_AGE:
+            cursor.execute('SELECT bill_id, category FROM legislation ORDER BY id')
+            self._category_index = topic_matcher.BillCategoryIndex(cursor.fetchall())
+            self._category_index_built_at = time.monotonic()
+        return self._category_index
+
+    def process_batch(self):
+        """
+        Claims and enriches up to batch_size queued complaints. Returns how many were
+        processed (0 when nothing is due), or None if the batch failed.
+        """
+        job_ids = []
+        try:
+            with db_pool.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT j.complaint_id, c.complaint_text
+                    FROM complaint_jobs j
+                    JOIN complaints c ON c.id = j.complaint_id
+                    WHERE j.available_at <= CURRENT_TIMESTAMP AND j.attempts < %s
+                    ORDER BY j.available_at, j.complaint_id
+                    LIMIT %s
+                    FOR UPDATE OF j SKIP LOCKED
+                """, (MAX_ATTEMPTS, self.batch_size))
+                jobs = cursor.fetchall()
+                if not jobs:
+                    return 0
+                job_ids = [complaint_id for complaint_id, _ in jobs]
+
+                index = self.category_index(cursor)
+                enriched = []
+                topic_counts = collections.Counter()
+                for complaint_id, complaint_text in jobs:
+                    topics = topic_matcher.extract_topics_from_text(complaint_text)
+                    matched_bill_ids = index.match(topics)
+                    enriched.append((complaint_id, ','.join(topics), ','.join(matched_bill_ids)))
+                    topic_counts.update(set(topics))
+
+                psycopg2.extras.execute_values(cursor, """
+                    UPDATE complaints c
+                    SET detected_topics = v.topics, matched_bills = v.bills, matched_categories = v.topics
+                    FROM (VALUES %s) AS v(id, topics, bills)
+                    WHERE c.id = v.id
+                """, enriched)
+                # Sorted, so concurrent workers lock topic rows in the same order
+                psycopg2.extras.execute_values(cursor, """
+                    INSERT INTO topic_interest (topic_name, category, interest_count, last_mentioned)
+                    VALUES %s
+                    ON CONFLICT (topic_name) DO UPDATE
+                    SET interest_count = topic_interest.interest_count + EXCLUDED.interest_count,
+                        last_mentioned = EXCLUDED.last_mentioned
+                """, [(topic, topic, count) for topic, count in sorted(topic_counts.items())],
+                    template="(%s, %s, %s, CURRENT_TIMESTAMP)")
+                cursor.execute('DELETE FROM complaint_jobs WHERE complaint_id = ANY(%s)', (job_ids,))
+                cursor.close()
+            return len(job_ids)
+
+        except Exception as e:
+            print(f"❌ Complaint batch failed ({len(job_ids)} jobs): {e}")
+            if job_ids:
+                try:
+                    with db_pool.transaction() as conn:
+                        cursor = conn.cursor()
+                        cursor.execute("""
+                            UPDATE complaint_jobs
+                            SET attempts = attempts + 1,
+                                available_at = CURRENT_TIMESTAMP + make_interval(secs => %s * (attempts + 1)),
+                                last_error = %s
+                            WHERE complaint_id = ANY(%s)
+                        """, (RETRY_BACKOFF_SECONDS, str(e), job_ids))
+                        cursor.close()
+                except Exception as backoff_error:
+                    # The jobs stay due and are simply claimed again on the next pass
+                    print(f"❌ Could not record the failure for {len(job_ids)} jobs: {backoff_error}")
+            return None
+
+    def run(self, poll_interval=1.0, once=False):
+        print(f"📮 Complaint worker started (batch size {self.batch_size})")
+        processed = 0
+        failures = 0
+        try:
+            while True:
+                try:
+                    count = self.process_batch()
+                except Exception as e:
+                    print(f"❌ Complaint worker error: {e}")
+                    count = None
+
+                if count is None:
+                    # Failed batch: the queue is not known to be empty, so keep going
+                    failures += 1
+                    if once and failures >= MAX_ATTEMPTS:
+                        print(f"❌ Giving up after {failures} failed batches in a row")
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                failures = 0
+                processed += count
+                if count:
+                    print(f"   ✅ {count} complaints processed ({processed} total)")
+                elif once:
+                    break
+                else:
+                    time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            pass
+        print(f"👋 Complaint worker stopped after {processed} complaints")
+        return processed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enrich queued /speak complaints with topics and matched bills")
+    parser.add_argument('--batch-size', type=int, default=50, help="complaints claimed per transaction (default 50)")
+    parser.add_argument('--poll-interval', type=float, default=1.0, help="seconds to wait when the queue is empty")
+    parser.add_argument('--once', action='store_true', help="exit once the queue is empty")
+    args = parser.parse_args()
+
+    ComplaintWorker(args.batch_size).run(args.poll_interval, args.once)
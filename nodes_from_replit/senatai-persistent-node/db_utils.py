@@ -1,38 +1,33 @@
 import psycopg2
+import psycopg2.extras
 import os
+import db_pool
+import user_cache
 from datetime import date, datetime # <-- ADDED datetime
 import random 
+import threading
+import time
 
 # Import the generation logic from your existing file
-from question_generator import generate_questions_for_bill
+from question_generator import generate_questions_for_bill, generate_question_hash
 
 # Import reward logic
-from policap_rewards import award_question_policap
+from policap_rewards import award_question_policap, award_submission_policap
 
-# Utility function (Assuming your connection logic is configured like this)
+# Connections come from the shared pool (DATABASE_URL, or the POSTGRES_* variables)
 def get_db_connection():
-    """Establishes a connection to the PostgreSQL database."""
-    # Ensure POSTGRES_DB is set, default to 'openparliament' as shown in psql output
-    db_name = os.environ.get('POSTGRES_DB', 'openparliament')
-    db_user = os.environ.get('POSTGRES_USER', 'dan') # Default to 'dan' as shown in psql output
-    
-    # You will need to set the POSTGRES_PASSWORD environment variable if it's required
-    db_password = os.environ.get('POSTGRES_PASSWORD', 'senatai2025') 
-    
+    """Checks out a pooled connection to the PostgreSQL database. Return it with release_db_connection()."""
     try:
-        conn = psycopg2.connect(
-            database=db_name,
-            user=db_user,
-            password=db_password,
-            host=os.environ.get('POSTGRES_HOST', 'localhost'),
-            port=os.environ.get('POSTGRES_PORT', '5432')
-        )
-        return conn
+        return db_pool.checkout()
     except psycopg2.Error as e:
         print(f"Database connection error: {e}")
         # Re-raise the error to be caught by the Flask application
         raise
 
+def release_db_connection(conn):
+    """Returns a connection from get_db_connection() to the pool."""
+    db_pool.release(conn)
+
 def get_questions_for_user_and_bill(senatair_id, bill_id, num_questions=10):
     """
     Retrieves questions for a bill that the user has NOT answered in the last 30 days.
@@ -93,84 +88,150 @@ def get_questions_for_user_and_bill(senatair_id, bill_id, num_questions=10):
         return []
         
     finally:
-        conn.close()
+        release_db_connection(conn)
 
-def save_questions_for_bill(bill_id, bill_title, bill_summary, category):
+# Per-bill question bank: questions are generated once, deduplicated by
+# (bill_id, question_hash) and reused. Pages read the bank through a small
+# in-process cache and only generate more when a bill has fewer than
+# QUESTION_BANK_MIN questions. Like save_vote_submission, these work on the
+# caller's cursor (the request's connection) and leave the commit to the caller.
+QUESTION_BANK_MIN = int(os.environ.get('SENATAI_QUESTION_BANK_MIN', '15'))
+QUESTION_BANK_TTL = float(os.environ.get('SENATAI_QUESTION_BANK_TTL', '300'))
+QUESTION_BANK_TOP_UP_ROUNDS = 3
+
+_question_bank = {}  # bill_id -> (expires_at, [question rows])
+_question_bank_lock = threading.Lock()
+
+
+def save_questions_for_bill(cursor, bill_id, bill_title, bill_summary, category, num_questions=5):
     """
-    Generates questions and saves them to the 'questions' table.
-    Returns the list of saved questions including their new database IDs.
+    Generates questions for a bill and upserts them into the question bank.
+    Questions already in the bank (same bill_id and question_hash) are skipped.
+    Returns the number of new questions stored, or None if saving failed (only
+    the upsert is rolled back; the caller's transaction stays usable).
     """
-    questions_data = generate_questions_for_bill(bill_id, bill_title, bill_summary, category)
-    conn = None
-    saved_questions = []
+    questions = generate_questions_for_bill(bill_id, bill_title, bill_summary, category, num_questions)
+    rows = []
+    for q in questions:
+        q_hash = q.get('question_hash') or generate_question_hash(q.get('text'), q.get('options'), context_id=bill_id)
+        rows.append((bill_id, q.get('type'), q.get('text'), q.get('options'), q.get('module_name'), q_hash))
+    if not rows:
+        return 0
+
+    cursor.execute('SAVEPOINT question_bank_top_up')
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        for q in questions_data:
-            cursor.execute(
-                """
-                INSERT INTO questions (bill_id, question_type, question_text, question_options, module_name)
-                VALUES (%s, %s, %s, %s, %s) RETURNING id;
-                """,
-                (bill_id, q.get('type'), q.get('text'), q.get('options'), q.get('module_name'))
-            )
-            q_id = cursor.fetchone()[0]
-            q['id'] = q_id  # Inject the new database ID
-            saved_questions.append(q)
-            
-        conn.commit()
-        return saved_questions
-        
-    except Exception as e:
+        inserted = psycopg2.extras.execute_values(cursor, """
+            INSERT INTO questions (bill_id, question_type, question_text, question_options, module_name, question_hash)
+            VALUES %s
+            ON CONFLICT (bill_id, question_hash) DO NOTHING
+            RETURNING id
+        """, rows, fetch=True)
+        cursor.execute('RELEASE SAVEPOINT question_bank_top_up')
+        return len(inserted)
+
+    except psycopg2.Error as e:
         print(f"Error saving questions for bill {bill_id}: {e}")
-        if conn: conn.rollback()
-        return questions_data 
-        
-    finally:
-        if conn: conn.close()
-def save_questions_for_bill(bill_id, bill_title, bill_summary, category):
+        cursor.execute('ROLLBACK TO SAVEPOINT question_bank_top_up')
+        return None
+
+
+def _load_question_bank(cursor, bill_id):
+    cursor.execute("""
+        SELECT id, bill_id, question_type, question_text, question_options, module_name, question_hash
+        FROM questions
+        WHERE bill_id = %s AND question_hash IS NOT NULL
+        ORDER BY id
+    """, (bill_id,))
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def get_bill_questions(cursor, bill_id, bill_title, bill_summary, category, num_questions=5):
     """
-    Generates questions and saves them to the 'questions' table.
-    Returns the list of saved questions including their new database IDs.
+    Returns num_questions random questions from the bill's question bank,
+    topping the bank up first if it holds fewer than QUESTION_BANK_MIN.
+    cursor must return dict rows (RealDictCursor). A bank read after a failed
+    top-up is served but not cached.
     """
+    now = time.monotonic()
+    with _question_bank_lock:
+        cached = _question_bank.get(bill_id)
+    if cached and cached[0] > now:
+        bank = cached[1]
+    else:
+        top_up_failed = False
+        cursor.execute('SAVEPOINT question_bank')
+        try:
+            bank = _load_question_bank(cursor, bill_id)
+            rounds = 0
+            while len(bank) < QUESTION_BANK_MIN and rounds < QUESTION_BANK_TOP_UP_ROUNDS:
+                rounds += 1
+                stored = save_questions_for_bill(cursor, bill_id, bill_title, bill_summary, category, QUESTION_BANK_MIN - len(bank))
+                if stored is None:
+                    top_up_failed = True
+                    break
+                if stored:
+                    bank = _load_question_bank(cursor, bill_id)
+            cursor.execute('RELEASE SAVEPOINT question_bank')
+        except psycopg2.Error as e:
+            print(f"Database error loading questions for bill {bill_id}: {e}")
+            cursor.execute('ROLLBACK TO SAVEPOINT question_bank')
+            return []
+        if not top_up_failed:
+            with _question_bank_lock:
+                _question_bank[bill_id] = (now + QUESTION_BANK_TTL, bank)
+
+    return [dict(q) for q in random.sample(bank, min(num_questions, len(bank)))]
+
+
+def save_vote_submission(cursor, senatair_id, votes, question_responses):
+    """
+    Writes a whole /vote submission on the caller's cursor; the caller commits.
+
+    votes: [(bill_id, vote)]
+    question_responses: [{'question_id', 'bill_id', 'value'}]
+
+    Votes and responses go in as one multi-row INSERT each, and the Policap
+    reward is credited with a single balance update (award_submission_policap),
+    so the statement count does not grow with the size of the form.
+    Returns the total reward.
+    """
+    if votes:
+        psycopg2.extras.execute_values(
+            cursor,
+            "INSERT INTO votes (user_id, bill_id, vote) VALUES %s",
+            [(senatair_id, bill_id, vote) for bill_id, vote in votes]
+        )
+
+    response_rows = []
+    for response in question_responses:
+        response_clean = str(response['value']).strip()
+        try:
+            numeric_value = float(response_clean)
+        except ValueError:
+            numeric_value = None # Not a numeric response
+        response_rows.append((senatair_id, response['question_id'], response['bill_id'], response_clean, numeric_value))
+    if response_rows:
+        psycopg2.extras.execute_values(cursor, """
+            INSERT INTO question_responses (senatair_id, question_id, bill_id, response_value, response_numeric)
+            VALUES %s
+        """, response_rows)
+
+    vote_reward, question_reward = award_submission_policap(cursor, senatair_id, len(votes), len(response_rows))
+
+    transactions = []
+    if vote_reward:
+        transactions.append((senatair_id, vote_reward, 'voting_reward', f'Reward for voting on {len(votes)} bills'))
+    if question_reward:
+        transactions.append((senatair_id, question_reward, 'question_reward', f'Reward for answering {len(response_rows)} questions'))
+    if transactions:
+        psycopg2.extras.execute_values(cursor, """
+            INSERT INTO policap_transactions (senatair_id, amount, transaction_type, description)
+            VALUES %s
+        """, transactions)
+
+    return vote_reward + question_reward
+
 
-    # 1. Capture the two lists returned by the new question_generator logic
-    permanent_questions, bill_specific_questions = generate_questions_for_bill(bill_id, bill_title, bill_summary, category)
-    
-    # Combine them for saving
-    questions_to_save = permanent_questions + bill_specific_questions
-    
-    conn = None
-    saved_questions = []
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        for q in questions_to_save: # Iterate over the combined list
-            cursor.execute(
-                """
-                -- CRITICAL: Added 'question_hash' to the INSERT
-                INSERT INTO questions (bill_id, question_type, question_text, question_options, module_name, question_hash)
-                VALUES (%s, %s, %s, %s, %s, %s) RETURNING id;
-                """,
-                # CRITICAL: Added q.get('question_hash') to the parameter tuple
-                (bill_id, q.get('type'), q.get('text'), q.get('options'), q.get('module_name'), q.get('question_hash'))
-            )
-            q_id = cursor.fetchone()[0]
-            q['id'] = q_id  # Inject the new database ID
-            saved_questions.append(q)
-            
-        conn.commit()
-        return saved_questions
-        
-    except Exception as e:
-        print(f"Error saving questions for bill {bill_id}: {e}")
-        if conn: conn.rollback()
-        return questions_to_save # Return the generated data even if save fails
-        
-    finally:
-        if conn: conn.close()
 def save_question_responses(senatair_id, question_responses):
     """
     Saves the senatair's question responses to the 'question_responses' table and awards Policap.
@@ -211,6 +272,7 @@ def save_question_responses(senatair_id, question_responses):
             total_reward += reward
             
         conn.commit()
+        user_cache.invalidate(senatair_id)
         return True, total_reward
         
     except Exception as e:
@@ -219,4 +281,4 @@ def save_question_responses(senatair_id, question_responses):
         return False, 0.0
         
     finally:
-        if conn: conn.close()
+        if conn: release_db_connection(conn)
@@ -178,6 +178,226 @@ CREATE INDEX IF NOT EXISTS idx_questions_bill_id ON questions(bill_id);
 CREATE INDEX IF NOT EXISTS idx_question_responses_senatair ON question_responses(senatair_id);
 CREATE INDEX IF NOT EXISTS idx_question_responses_question ON question_responses(question_id);
 
+-- Site-wide row counts for /home and /admin (app.py get_site_counts; init_db() creates the same).
+-- Statement-level triggers keep them in step with every INSERT/DELETE/TRUNCATE, and each
+-- counter is seeded once while writers are blocked, so no row is missed.
+CREATE TABLE IF NOT EXISTS site_counters (
+    name VARCHAR(50) PRIMARY KEY,
+    value BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION site_counters_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE site_counters
+        SET value = value + (SELECT COUNT(*) FROM new_rows), updated_at = CURRENT_TIMESTAMP
+        WHERE name = TG_TABLE_NAME;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE site_counters
+        SET value = value - (SELECT COUNT(*) FROM old_rows), updated_at = CURRENT_TIMESTAMP
+        WHERE name = TG_TABLE_NAME;
+    ELSE
+        UPDATE site_counters SET value = 0, updated_at = CURRENT_TIMESTAMP WHERE name = TG_TABLE_NAME;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Same table list as SITE_COUNTER_TABLES in app.py
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['users', 'legislation', 'complaints', 'votes'] LOOP
+        IF to_regclass(t) IS NOT NULL THEN
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t || '_count_insert', t);
+            EXECUTE format('CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows '
+                           'FOR EACH STATEMENT EXECUTE FUNCTION site_counters_apply()', t || '_count_insert', t);
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t || '_count_delete', t);
+            EXECUTE format('CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows '
+                           'FOR EACH STATEMENT EXECUTE FUNCTION site_counters_apply()', t || '_count_delete', t);
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t || '_count_truncate', t);
+            EXECUTE format('CREATE TRIGGER %I AFTER TRUNCATE ON %I '
+                           'FOR EACH STATEMENT EXECUTE FUNCTION site_counters_apply()', t || '_count_truncate', t);
+            EXECUTE format('LOCK TABLE %I IN SHARE MODE', t);
+            EXECUTE format('INSERT INTO site_counters (name, value) SELECT %L, COUNT(*) FROM %I '
+                           'ON CONFLICT (name) DO NOTHING', t, t);
+        END IF;
+    END LOOP;
+END $$;
+
+-- /vote bill sampling (app.py sample_unvoted_bills): random sort key on legislation and
+-- the (user_id, bill_id) index for the already-voted anti-join, as in init_db().
+DO $$
+BEGIN
+    IF to_regclass('legislation') IS NOT NULL THEN
+        ALTER TABLE legislation ADD COLUMN IF NOT EXISTS random_key DOUBLE PRECISION NOT NULL DEFAULT random();
+        CREATE INDEX IF NOT EXISTS idx_legislation_random_key ON legislation(random_key);
+    END IF;
+
+    IF to_regclass('votes') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_votes_user_bill ON votes(user_id, bill_id);
+    END IF;
+END $$;
+
+-- Per-bill consensus tallies for /consensus and /consensus_forums (app.py get_bill_tallies;
+-- init_db() creates the same). Kept current by statement-level triggers on votes and
+-- policap_spending, like site_counters; only tables keyed by bill_id get the triggers.
+CREATE TABLE IF NOT EXISTS bill_vote_tallies (
+    bill_id VARCHAR(50) NOT NULL,
+    vote VARCHAR(10) NOT NULL,
+    vote_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bill_id, vote)
+);
+
+CREATE TABLE IF NOT EXISTS bill_spending_tallies (
+    bill_id VARCHAR(50) NOT NULL,
+    spending_type VARCHAR(20) NOT NULL,
+    spend_count BIGINT NOT NULL DEFAULT 0,
+    spend_sum DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (bill_id, spending_type)
+);
+
+CREATE OR REPLACE FUNCTION bill_vote_tallies_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM bill_vote_tallies;
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE bill_vote_tallies t
+        SET vote_count = t.vote_count - o.n
+        FROM (SELECT bill_id, vote, COUNT(*) AS n FROM old_rows GROUP BY bill_id, vote) o
+        WHERE t.bill_id = o.bill_id AND t.vote = o.vote;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO bill_vote_tallies (bill_id, vote, vote_count)
+        SELECT bill_id, vote, COUNT(*) FROM new_rows GROUP BY bill_id, vote ORDER BY bill_id, vote
+        ON CONFLICT (bill_id, vote) DO UPDATE
+        SET vote_count = bill_vote_tallies.vote_count + EXCLUDED.vote_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION bill_spending_tallies_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM bill_spending_tallies;
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE bill_spending_tallies t
+        SET spend_count = t.spend_count - o.n, spend_sum = t.spend_sum - o.total
+        FROM (SELECT bill_id, spending_type, COUNT(*) AS n, SUM(policap_spent) AS total
+              FROM old_rows GROUP BY bill_id, spending_type) o
+        WHERE t.bill_id = o.bill_id AND t.spending_type = o.spending_type;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO bill_spending_tallies (bill_id, spending_type, spend_count, spend_sum)
+        SELECT bill_id, spending_type, COUNT(*), SUM(policap_spent)
+        FROM new_rows GROUP BY bill_id, spending_type ORDER BY bill_id, spending_type
+        ON CONFLICT (bill_id, spending_type) DO UPDATE
+        SET spend_count = bill_spending_tallies.spend_count + EXCLUDED.spend_count,
+            spend_sum = bill_spending_tallies.spend_sum + EXCLUDED.spend_sum;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t TEXT;
+    fn TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['votes', 'policap_spending'] LOOP
+        IF EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_name = t AND column_name = 'bill_id') THEN
+            fn := CASE t WHEN 'votes' THEN 'bill_vote_tallies_apply' ELSE 'bill_spending_tallies_apply' END;
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t || '_tally_insert', t);
+            EXECUTE format('CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows '
+                           'FOR EACH STATEMENT EXECUTE FUNCTION %I()', t || '_tally_insert', t, fn);
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t || '_tally_update', t);
+            EXECUTE format('CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+                           'FOR EACH STATEMENT EXECUTE FUNCTION %I()', t || '_tally_update', t, fn);
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t || '_tally_delete', t);
+            EXECUTE format('CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows '
+                           'FOR EACH STATEMENT EXECUTE FUNCTION %I()', t || '_tally_delete', t, fn);
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t || '_tally_truncate', t);
+            EXECUTE format('CREATE TRIGGER %I AFTER TRUNCATE ON %I '
+                           'FOR EACH STATEMENT EXECUTE FUNCTION %I()', t || '_tally_truncate', t, fn);
+
+            -- Seed from existing rows (writers wait on the lock, so none are missed or double counted)
+            EXECUTE format('LOCK TABLE %I IN SHARE MODE', t);
+            IF t = 'votes' THEN
+                INSERT INTO bill_vote_tallies (bill_id, vote, vote_count)
+                SELECT bill_id, vote, COUNT(*) FROM votes GROUP BY bill_id, vote
+                ON CONFLICT (bill_id, vote) DO NOTHING;
+            ELSE
+                INSERT INTO bill_spending_tallies (bill_id, spending_type, spend_count, spend_sum)
+                SELECT bill_id, spending_type, COUNT(*), SUM(policap_spent) FROM policap_spending
+                GROUP BY bill_id, spending_type
+                ON CONFLICT (bill_id, spending_type) DO NOTHING;
+            END IF;
+        END IF;
+    END LOOP;
+END $$;
+
+-- Per-bill question bank (db_utils.get_bill_questions): one row per (bill_id, question_hash).
+-- Duplicates saved by older versions are merged into the lowest id first, responses included.
+ALTER TABLE questions ADD COLUMN IF NOT EXISTS question_hash VARCHAR(64);
+
+WITH ranked AS (
+    SELECT id, MIN(id) OVER (PARTITION BY bill_id, question_hash) AS keep_id
+    FROM questions
+    WHERE question_hash IS NOT NULL
+)
+UPDATE question_responses qr
+SET question_id = ranked.keep_id
+FROM ranked
+WHERE qr.question_id = ranked.id AND ranked.id <> ranked.keep_id;
+
+DELETE FROM questions q
+USING (
+    SELECT id, MIN(id) OVER (PARTITION BY bill_id, question_hash) AS keep_id
+    FROM questions
+    WHERE question_hash IS NOT NULL
+) ranked
+WHERE q.id = ranked.id AND ranked.id <> ranked.keep_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_questions_bill_hash ON questions(bill_id, question_hash);
+
+-- One topic_interest row per topic, so /speak can upsert every detected topic in one statement.
+-- Rows duplicated by the old select-then-insert code are folded into the lowest id first.
+WITH merged AS (
+    SELECT MIN(id) AS keep_id, topic_name, SUM(interest_count) AS total, MAX(last_mentioned) AS latest
+    FROM topic_interest
+    GROUP BY topic_name
+    HAVING COUNT(*) > 1
+)
+UPDATE topic_interest t
+SET interest_count = merged.total, last_mentioned = merged.latest
+FROM merged
+WHERE t.id = merged.keep_id;
+
+DELETE FROM topic_interest t
+USING topic_interest keep
+WHERE keep.topic_name = t.topic_name AND keep.id < t.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_topic_interest_topic_name ON topic_interest(topic_name);
+
+-- Work queue for complaint post-processing (complaint_worker.py claims rows with FOR UPDATE SKIP LOCKED).
+-- /speak inserts the raw complaint plus a job; jobs that keep failing stay here with last_error.
+CREATE TABLE IF NOT EXISTS complaint_jobs (
+    complaint_id INTEGER PRIMARY KEY REFERENCES complaints(id) ON DELETE CASCADE,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    enqueued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_complaint_jobs_available ON complaint_jobs(available_at, complaint_id);
+
 -- Create indexes for existing user tables (if they exist)
 DO $$
 BEGIN
@@ -190,6 +190,56 @@ def award_question_policap(cursor, user_id, is_postgres=False):
     return reward
 
 
+def award_submission_policap(cursor, user_id, vote_count, question_count, today=None):
+    """
+    Award Policap for a whole /vote submission in one pass (PostgreSQL)
+    
+    Bumps today's daily counts with a single upsert, prices every vote and
+    answer on the same diminishing-returns schedule as one-at-a-time awards,
+    and credits the total with one balance update.
+    
+    Args:
+        cursor: Database cursor (with active transaction)
+        user_id: User ID
+        vote_count: Votes in this submission
+        question_count: Question answers in this submission
+        today: Date to count against (defaults to today)
+    
+    Returns:
+        tuple: (vote_reward, question_reward)
+    """
+    if today is None:
+        today = date.today()
+    
+    # The row lock taken by the upsert serializes concurrent submissions for this user
+    cursor.execute('''
+        INSERT INTO daily_question_count (senatair_id, activity_date, question_count, vote_count)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (senatair_id, activity_date) DO UPDATE
+        SET question_count = daily_question_count.question_count + EXCLUDED.question_count,
+            vote_count = daily_question_count.vote_count + EXCLUDED.vote_count
+        RETURNING question_count, vote_count
+    ''', (user_id, today, question_count, vote_count))
+    result = cursor.fetchone()
+    if isinstance(result, dict):  # RealDictCursor
+        result = (result['question_count'], result['vote_count'])
+    questions_before = result[0] - question_count
+    votes_before = result[1] - vote_count
+    
+    vote_reward = sum(calculate_voting_reward(votes_before + i) for i in range(vote_count))
+    question_reward = sum(calculate_question_reward(questions_before + i) for i in range(question_count))
+    total = round(vote_reward + question_reward, 4)
+    
+    if total:
+        cursor.execute('''
+            UPDATE senatairs 
+            SET policaps = policaps + %s
+            WHERE id = %s
+        ''', (total, user_id))
+    
+    return vote_reward, question_reward
+
+
 def get_reward_preview(daily_question_count):
     """
     Get a preview of the next few rewards without awarding them
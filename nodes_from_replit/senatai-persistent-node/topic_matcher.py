@@ -83,6 +83,39 @@ def match_bills_to_complaint(complaint_text, all_bills):
          
     return matched_bills
 
+class BillCategoryIndex:
+    """
+    In-memory category -> bill_id index, so complaint matching only touches
+    bills in the detected topics instead of scanning every bill.
+    Matches come back in the order the rows were given, like
+    match_bills_to_complaint.
+    """
+    
+    def __init__(self, bills, default_count=5):
+        """bills: (bill_id, category) pairs; a missing category counts as 'Other'."""
+        self.by_category = {}
+        self.position = {}
+        for bill_id, category in bills:
+            if bill_id in self.position:
+                continue
+            self.position[bill_id] = len(self.position)
+            self.by_category.setdefault(category or 'Other', []).append(bill_id)
+        # Low-relevance fallback when no category matches (first bills, as before)
+        self.default_bills = list(self.position)[:default_count]
+    
+    def __len__(self):
+        return len(self.position)
+    
+    def match(self, topics):
+        """bill_ids in any of the topics' categories, or the default bills if none."""
+        matched = []
+        for topic in dict.fromkeys(topics):
+            matched.extend(self.by_category.get(topic, []))
+        if len(topics) > 1:
+            matched.sort(key=self.position.get)
+        return matched or list(self.default_bills)
+
+
 def extract_complaint_summary(complaint_text, max_length=100):
     """
     Create a short summary of the complaint for display.
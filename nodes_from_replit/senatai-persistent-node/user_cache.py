@@ -0,0 +1,77 @@
+# user_cache.py
+"""
+Short-lived in-process cache of the identity fields Flask-Login needs to
+rebuild current_user (username, Policap balance, admin flag).
+
+load_user() runs on every authenticated request; with this cache it only
+queries senatairs once per user per TTL. Code that changes those fields
+(Policap rewards, admin changes) calls invalidate() so the next request
+reloads them. Each worker process has its own cache, so another process
+can serve a stale balance for at most SENATAI_USER_CACHE_TTL seconds
+(default 30, 0 disables caching).
+"""
+import os
+import threading
+import time
+
+DEFAULT_TTL = float(os.environ.get('SENATAI_USER_CACHE_TTL', '30'))
+MAX_ENTRIES = 10000
+
+
+class UserIdentityCache:
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}  # user id -> (expires_at, identity dict)
+
+    def get(self, user_id):
+        """Cached identity dict for user_id, or None if missing or expired."""
+        key = int(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            return dict(entry[1])
+
+    def put(self, user_id, identity):
+        if self.ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Drop expired entries first, then the ones closest to expiry
+                for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+                    del self._entries[key]
+                if len(self._entries) >= self.max_entries:
+                    oldest = sorted(self._entries, key=lambda key: self._entries[key][0])
+                    for key in oldest[:len(oldest) // 10 + 1]:
+                        del self._entries[key]
+            self._entries[int(user_id)] = (now + self.ttl, dict(identity))
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(int(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = UserIdentityCache()
+
+
+def get(user_id):
+    return _cache.get(user_id)
+
+
+def put(user_id, identity):
+    _cache.put(user_id, identity)
+
+
+def invalidate(user_id):
+    """Forget user_id's cached identity; call after changing their balance or admin flag."""
+    _cache.invalidate(user_id)
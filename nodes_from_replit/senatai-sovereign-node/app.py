@@ -14,6 +14,7 @@ import icebreakers
 import demographics
 import policap_rewards
 import badges
+import keyword_index
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 os.makedirs(DATA_DIR, exist_ok=True)
@@ -30,6 +31,15 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+# Shared read-only keyword index (published by keyword_index.py, mapped once per process).
+# Opened lazily, so a node started before the first publish picks it up without a restart.
+_KEYWORD_INDEX = keyword_index.LazyIndex()
+
+
+def get_keyword_index():
+    """The shared KeywordIndex, or None until keyword_index.py has published one."""
+    return _KEYWORD_INDEX.get()
+
 
 class User(UserMixin):
     def __init__(self, id, username, policap_balance, is_admin=False):
@@ -652,6 +662,43 @@ def speak():
     return render_template('speak.html', icebreaker=icebreaker)
 
 
+@app.route('/search_bills', methods=['POST'])
+def search_bills():
+    """Rank bills for free text against the shared keyword index (no DB hit for ranking)"""
+    index = get_keyword_index()
+    if index is None:
+        return jsonify({'error': 'Keyword index has not been published yet', 'bills': []}), 503
+    
+    user_input = request.form.get('user_input', '')
+    ranked = index.top_k(index.match_terms(keyword_index.query_keywords(user_input)), 6)
+    if not ranked:
+        return jsonify({'bills': []})
+    
+    conn = get_db()
+    cursor = conn.cursor()
+    bill_numbers = [bill_number for bill_number, _, _ in ranked]
+    placeholders = ','.join(['?' for _ in bill_numbers])
+    cursor.execute(f'SELECT bill_id, bill_title, status, category FROM legislation WHERE bill_id IN ({placeholders})',
+                  bill_numbers)
+    details = {row['bill_id']: row for row in cursor.fetchall()}
+    conn.close()
+    
+    bills = []
+    for bill_number, match_count, relevance in ranked:
+        bill = details.get(bill_number)
+        if bill:
+            bills.append({
+                'bill_id': bill_number,
+                'bill_title': bill['bill_title'],
+                'status': bill['status'],
+                'category': bill['category'],
+                'match_count': match_count,
+                'relevance': round(relevance, 3)
+            })
+    
+    return jsonify({'bills': bills})
+
+
 @app.route('/select_bills', methods=['GET', 'POST'])
 def select_bills():
     """Show 3-5 matched bills and let user select 1-2 to explore"""
@@ -0,0 +1,338 @@
+# keyword_index.py
+"""
+Compact on-disk inverted index over bill_keywords.
+
+The file is built from the database once per extraction run and then
+memory-mapped READ-ONLY by every process that ranks bills (the CLI survey,
+the persistent node and the sovereign node). The OS page cache shares the
+mapped pages between processes, and ranking a query never touches Postgres.
+
+File layout (little-endian, every section 4-byte aligned):
+
+    header          magic 'SNKI', version, n_terms, n_bills, n_postings, vocab_bytes
+    term_offsets    uint32[n_terms + 1]    byte offsets of each term in the vocab blob
+    posting_ptr     uint32[n_terms + 1]    CSR row pointer into the posting arrays
+    posting_bills   uint32[n_postings]     bill index for each posting
+    posting_weights float32[n_postings]    SUM(relevance_score) for (term, bill)
+    posting_counts  uint32[n_postings]     number of bill_keywords rows for (term, bill)
+    bill_offsets    uint32[n_bills + 1]    byte offsets of each bill number
+    vocab blob      sorted UTF-8 terms (padded to 4 bytes)
+    bill blob       UTF-8 bill numbers
+
+Publishing writes a temp file next to the target and os.replace()s it, so
+readers either see the old index or the new one, never a half-written file.
+Open KeywordIndex objects notice the new file on their next query and remap.
+"""
+import heapq
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+
+MAGIC = b'SNKI'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIII')
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    'SENATAI_KEYWORD_INDEX',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'keyword_index.bin')
+)
+
+
+def _pad4(n):
+    return (n + 3) & ~3
+
+
+def write_index(postings, path=DEFAULT_INDEX_PATH):
+    """
+    Writes and atomically publishes an index file.
+
+    Args:
+        postings: iterable of (keyword, bill_number, relevance_sum, row_count)
+        path: destination file
+
+    Returns:
+        dict: {'terms': int, 'bills': int, 'postings': int}
+    """
+    by_term = {}
+    bill_ids = {}
+    for keyword, bill_number, relevance, count in postings:
+        if not keyword or not bill_number:
+            continue
+        bill_idx = bill_ids.setdefault(bill_number, len(bill_ids))
+        term_postings = by_term.setdefault(keyword.encode('utf-8'), {})
+        weight, rows = term_postings.get(bill_idx, (0.0, 0))
+        term_postings[bill_idx] = (weight + float(relevance or 0.0), rows + int(count or 1))
+
+    terms = sorted(by_term)
+    bills = [number.encode('utf-8') for number, _ in sorted(bill_ids.items(), key=lambda item: item[1])]
+
+    term_offsets, posting_ptr = [0], [0]
+    posting_bills, posting_weights, posting_counts = [], [], []
+    for term in terms:
+        term_offsets.append(term_offsets[-1] + len(term))
+        for bill_idx, (weight, rows) in sorted(by_term[term].items()):
+            posting_bills.append(bill_idx)
+            posting_weights.append(weight)
+            posting_counts.append(rows)
+        posting_ptr.append(len(posting_bills))
+
+    bill_offsets = [0]
+    for number in bills:
+        bill_offsets.append(bill_offsets[-1] + len(number))
+
+    vocab_blob = b''.join(terms)
+    n_postings = len(posting_bills)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(terms), len(bills), n_postings, len(vocab_blob)))
+        f.write(struct.pack(f'<{len(term_offsets)}I', *term_offsets))
+        f.write(struct.pack(f'<{len(posting_ptr)}I', *posting_ptr))
+        f.write(struct.pack(f'<{n_postings}I', *posting_bills))
+        f.write(struct.pack(f'<{n_postings}f', *posting_weights))
+        f.write(struct.pack(f'<{n_postings}I', *posting_counts))
+        f.write(struct.pack(f'<{len(bill_offsets)}I', *bill_offsets))
+        f.write(vocab_blob + b'\0' * (_pad4(len(vocab_blob)) - len(vocab_blob)))
+        f.write(b''.join(bills))
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+
+    # Make the rename itself durable
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+    return {'terms': len(terms), 'bills': len(bills), 'postings': n_postings}
+
+
+def build_index(conn, path=DEFAULT_INDEX_PATH):
+    """Builds the index from the bill_keywords table and publishes it to path."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT keyword, bill_number, SUM(relevance_score), COUNT(*)
+            FROM bill_keywords
+            WHERE keyword IS NOT NULL AND bill_number IS NOT NULL
+            GROUP BY keyword, bill_number
+        """)
+        return write_index(cursor.fetchall(), path)
+    finally:
+        cursor.close()
+
+
+class _MappedIndex:
+    """One immutable, memory-mapped version of the index file."""
+
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise RuntimeError("keyword index files are little-endian; big-endian hosts are not supported")
+
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n_terms, n_bills, n_postings, vocab_bytes = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} keyword index")
+
+        self.n_terms = n_terms
+        self.n_bills = n_bills
+        self.n_postings = n_postings
+
+        view = memoryview(self._mmap)
+        pos = HEADER.size
+
+        def section(count, fmt):
+            nonlocal pos
+            start, pos = pos, pos + 4 * count
+            return view[start:pos].cast(fmt)
+
+        self.term_offsets = section(n_terms + 1, 'I')
+        self.posting_ptr = section(n_terms + 1, 'I')
+        self.posting_bills = section(n_postings, 'I')
+        self.posting_weights = section(n_postings, 'f')
+        self.posting_counts = section(n_postings, 'I')
+        self.bill_offsets = section(n_bills + 1, 'I')
+        self.vocab = view[pos:pos + vocab_bytes]
+        pos += _pad4(vocab_bytes)
+        self.bill_blob = view[pos:]
+
+    def term_id(self, term):
+        """Binary search over the sorted vocabulary. Returns -1 if absent."""
+        target = term.encode('utf-8')
+        lo, hi = 0, self.n_terms
+        offsets, vocab = self.term_offsets, self.vocab
+        while lo < hi:
+            mid = (lo + hi) // 2
+            candidate = vocab[offsets[mid]:offsets[mid + 1]].tobytes()
+            if candidate < target:
+                lo = mid + 1
+            elif candidate > target:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def bill_number(self, bill_idx):
+        return self.bill_blob[self.bill_offsets[bill_idx]:self.bill_offsets[bill_idx + 1]].tobytes().decode('utf-8')
+
+
+class KeywordIndex:
+    """
+    Read-only handle on the shared keyword index.
+
+    top_k() ranks exactly like the old SQL:
+        WHERE keyword = ANY(keywords) GROUP BY bill_number
+        ORDER BY SUM(relevance_score) DESC, COUNT(*) DESC
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._index = _MappedIndex(path)
+        self._last_check = time.monotonic()
+
+    def _refresh(self):
+        """Remaps the file if a new version has been published since the last check."""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return # Keep serving the version we already have
+        if (stat.st_ino, stat.st_mtime_ns, stat.st_size) != self._index.identity:
+            try:
+                self._index = _MappedIndex(self.path)
+            except (OSError, ValueError):
+                pass
+
+    def top_k(self, keywords, k=6):
+        """
+        Returns up to k (bill_number, match_count, total_relevance) tuples,
+        best match first.
+        """
+        self._refresh()
+        index = self._index
+
+        scores = {}
+        for keyword in set(keywords):
+            term = index.term_id(keyword)
+            if term < 0:
+                continue
+            for p in range(index.posting_ptr[term], index.posting_ptr[term + 1]):
+                bill_idx = index.posting_bills[p]
+                relevance, count = scores.get(bill_idx, (0.0, 0))
+                scores[bill_idx] = (relevance + index.posting_weights[p], count + index.posting_counts[p])
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1][0], item[1][1], -item[0]))
+        return [(index.bill_number(bill_idx), count, relevance) for bill_idx, (relevance, count) in best]
+
+    def match_terms(self, words):
+        """
+        Maps raw query words (query_keywords) onto the vocabulary, which holds
+        spaCy lemmas: each word becomes the first of word_forms(word) the index
+        contains, and words with no match are dropped.
+        """
+        self._refresh()
+        index = self._index
+        terms = []
+        for word in words:
+            for form in word_forms(word):
+                if index.term_id(form) >= 0:
+                    terms.append(form)
+                    break
+        return terms
+
+    @property
+    def version(self):
+        """Identity of the currently mapped file; changes when a new index is published."""
+        self._refresh()
+        return self._index.identity
+
+    @property
+    def stats(self):
+        return {'terms': self._index.n_terms, 'bills': self._index.n_bills, 'postings': self._index.n_postings}
+
+
+def query_keywords(text):
+    """
+    spaCy-free keyword split for the web nodes: lowercase words longer than
+    3 letters, matching the length filter the survey applies to lemmas. The
+    words are not lemmatized; pass them through KeywordIndex.match_terms().
+    """
+    return [word for word in re.findall(r"[a-z]+", (text or '').lower()) if len(word) > 3]
+
+
+def word_forms(word):
+    """
+    The word followed by cheap guesses at its lemma (plural and -ed/-ing endings
+    stripped), e.g. 'taxes' -> 'tax', 'policies' -> 'policy', 'houses' -> 'house'.
+    Only used to look words up in the vocabulary, so wrong guesses just miss.
+    """
+    forms = [word]
+    if word.endswith('ies') and len(word) > 4:
+        forms.append(word[:-3] + 'y')
+    if word.endswith('s') and not word.endswith('ss'):
+        forms.append(word[:-1])
+        if word.endswith('es'):
+            forms.append(word[:-2])
+    for suffix in ('ing', 'ed'):
+        if word.endswith(suffix) and len(word) - len(suffix) > 2:
+            stem = word[:-len(suffix)]
+            forms += [stem, stem + 'e']
+            if len(stem) > 3 and stem[-1] == stem[-2]:
+                forms.append(stem[:-1])  # 'planned' -> 'plan'
+    return forms
+
+
+def open_index(path=DEFAULT_INDEX_PATH, quiet=False):
+    """Opens the shared index, or returns None if it has not been published yet."""
+    try:
+        return KeywordIndex(path)
+    except (OSError, ValueError, RuntimeError) as e:
+        if not quiet:
+            print(f"ℹ️  Keyword index not available ({e}); falling back to SQL ranking.")
+        return None
+
+
+class LazyIndex:
+    """
+    Opens the shared index on first use instead of at import. While no index
+    has been published, get() retries open_index() at most once per
+    retry_interval seconds, so a process started before the extractor's first
+    publish picks the index up without a restart (later versions are then
+    swapped in by KeywordIndex itself).
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, retry_interval=1.0):
+        self.path = path
+        self.retry_interval = retry_interval
+        self._index = None
+        self._last_attempt = None
+
+    def get(self):
+        """The open KeywordIndex, or None if it is still not published."""
+        if self._index is None:
+            now = time.monotonic()
+            if self._last_attempt is None or now - self._last_attempt >= self.retry_interval:
+                quiet = self._last_attempt is not None  # Report the missing index once
+                self._last_attempt = now
+                self._index = open_index(self.path, quiet=quiet)
+        return self._index
+
+
+# No builder here: this node is offline and SQLite-backed. Copy the file published
+# by the top-level keyword_index.py into data/ (see README.md).
@@ -0,0 +1,217 @@
+# perf_metrics.py
+"""
+Opt-in stage and SQL timers for the survey loop and pooled connections.
+
+Disabled unless SENATAI_METRICS is set:
+
+    SENATAI_METRICS=stdout            summary table printed on exit (also: 1, true)
+    SENATAI_METRICS=/tmp/metrics.json histograms written as JSON on exit
+
+Code marks stages with
+
+    with perf_metrics.stage('nlp'):
+        ...
+
+When disabled, stage() hands back one shared no-op context manager, so the
+cost is a function call and an attribute lookup. When enabled, db_pool
+creates its connections with TimedCursor and every execute() is recorded
+under a label derived from the statement text.
+
+Each histogram keeps count/sum/min/max plus fixed log-spaced buckets, so
+memory stays constant however long the process runs; percentiles are
+reported as the upper bound of the bucket they fall in.
+"""
+import atexit
+import bisect
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+import psycopg2.extensions
+
+# Bucket upper bounds in milliseconds (the last bucket is open-ended)
+BUCKET_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+MAX_SQL_LABELS = 200
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (max for the open bucket)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return min(BUCKET_BOUNDS_MS[i], self.max_ms) if i < len(BUCKET_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total_ms / self.count if self.count else 0.0,
+            'min_ms': self.min_ms or 0.0,
+            'p50_ms': self.quantile(0.50),
+            'p95_ms': self.quantile(0.95),
+            'p99_ms': self.quantile(0.99),
+            'max_ms': self.max_ms,
+            'buckets': dict(zip([f"le_{bound}" for bound in BUCKET_BOUNDS_MS] + ['le_inf'], self.buckets))
+        }
+
+
+class _StageTimer:
+    __slots__ = ('registry', 'kind', 'name', 'started')
+
+    def __init__(self, registry, kind, name):
+        self.registry = registry
+        self.kind = kind
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.kind, self.name, (time.perf_counter() - self.started) * 1000)
+        return False
+
+
+_DISABLED = nullcontext()
+
+
+class Metrics:
+    def __init__(self, destination=None):
+        """destination: None (disabled), 'stdout', or a file path for JSON output."""
+        self.destination = destination
+        self.enabled = destination is not None
+        self._lock = threading.Lock()
+        self._histograms = {'stage': {}, 'sql': {}}
+        self.started_at = time.time()
+
+    @classmethod
+    def from_env(cls):
+        setting = os.environ.get('SENATAI_METRICS', '').strip()
+        if not setting or setting.lower() in ('0', 'false', 'off', 'no'):
+            return cls(None)
+        if setting.lower() in ('1', 'true', 'on', 'yes', 'stdout'):
+            return cls('stdout')
+        return cls(setting)
+
+    def stage(self, name):
+        if not self.enabled:
+            return _DISABLED
+        return _StageTimer(self, 'stage', name)
+
+    def observe(self, kind, name, ms):
+        with self._lock:
+            histograms = self._histograms[kind]
+            histogram = histograms.get(name)
+            if histogram is None:
+                if kind == 'sql' and len(histograms) >= MAX_SQL_LABELS:
+                    name = '(other statements)'
+                histogram = histograms.setdefault(name, Histogram())
+            histogram.observe(ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'dumped_at': time.time(),
+                'stages': {name: h.as_dict() for name, h in self._histograms['stage'].items()},
+                'sql': {name: h.as_dict() for name, h in self._histograms['sql'].items()}
+            }
+
+    def dump(self):
+        if not self.enabled:
+            return
+        data = self.snapshot()
+        if not data['stages'] and not data['sql']:
+            return
+        if self.destination == 'stdout':
+            print_summary(data)
+            return
+        try:
+            with open(self.destination, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            print(f"📊 Timing metrics written to {self.destination}")
+        except OSError as e:
+            print(f"⚠️  Could not write timing metrics to {self.destination}: {e}")
+            print_summary(data)
+
+
+def print_summary(data, out=None):
+    out = out or sys.stdout
+    for title, section in (('STAGE', data['stages']), ('SQL STATEMENT', data['sql'])):
+        if not section:
+            continue
+        print(f"\n📊 {title} TIMINGS (ms, percentiles are bucket upper bounds)", file=out)
+        print(f"{'count':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  name", file=out)
+        for name, row in sorted(section.items(), key=lambda item: -item[1]['count'] * item[1]['mean_ms']):
+            print(f"{row['count']:>7}{row['mean_ms']:>9.2f}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+                  f"{row['p99_ms']:>9.2f}{row['max_ms']:>9.2f}  {name}", file=out)
+
+
+_WHITESPACE = re.compile(r'\s+')
+_VALUES = re.compile(r'\bVALUES\b.*', re.IGNORECASE | re.DOTALL)
+
+
+def sql_label(query, width=90):
+    """Stable label for a statement: whitespace collapsed, literal VALUES lists dropped."""
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    elif not isinstance(query, str):
+        query = str(query)  # psycopg2.sql.Composed
+    label = _VALUES.sub('VALUES …', _WHITESPACE.sub(' ', query).strip())
+    return label if len(label) <= width else label[:width - 1] + '…'
+
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """Cursor that records every execute() in the SQL histograms."""
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            registry.observe('sql', sql_label(query), (time.perf_counter() - started) * 1000)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            registry.observe('sql', sql_label(query), (time.perf_counter() - started) * 1000)
+
+
+registry = Metrics.from_env()
+if registry.enabled:
+    atexit.register(registry.dump)
+
+
+def enabled():
+    return registry.enabled
+
+
+def stage(name):
+    """Times the enclosed block as stage `name` (no-op unless SENATAI_METRICS is set)."""
+    return registry.stage(name)
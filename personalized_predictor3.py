@@ -1,52 +1,63 @@
 # personalized_predictor3.py
-import psycopg2
+import db_pool
 from collections import defaultdict
 import random
+import time
+
+import numpy as np
+
+import bill_keyword_matrix
+
+
+def stance_label(prediction_score):
+    """Converts a 1-5 prediction score into a user-friendly stance."""
+    if prediction_score < 2.5:
+        return "Likely Oppose"
+    elif prediction_score < 3.5:
+        return "Neutral/Uncertain"
+    return "Likely Support"
 
 class PersonalizedPredictor:
     def __init__(self, user_id):
         self.user_id = user_id
-        self.db_conn = psycopg2.connect(
-            dbname="openparliament",
-            user="dan", 
-            password="senatai2025",
-            host="localhost"
-        )
+        self.db_conn = db_pool.checkout()
         # Store user's average sentiment for each keyword: {'keyword': [count, total_score]}
         self.keyword_sentiment = defaultdict(lambda: [0, 0])
         self.load_user_data()
 
     def load_user_data(self):
-        """Loads all past responses for the user to train the simple predictor."""
-        print(f"🔄 Loading past responses for User ID: {self.user_id}...")
+        """
+        Loads the user's keyword sentiment profile from senatair_keyword_sentiment:
+        one row per distinct keyword, kept up to date by a trigger on senatair_responses.
+        """
+        print(f"🔄 Loading keyword sentiment for User ID: {self.user_id}...")
         cursor = self.db_conn.cursor()
         
-        # NOTE: We fetch matched_keywords and the answer_text (the numeric score 1-5)
         cursor.execute("""
-            SELECT matched_keywords, answer_text
-            FROM senatair_responses
+            SELECT keyword, response_count, score_sum
+            FROM senatair_keyword_sentiment
             WHERE senatair_id = %s
-            AND answer_text IN ('1', '2', '3', '4', '5')
         """, (self.user_id,))
         
-        results = cursor.fetchall()
-        
-        for keywords_str, score_str in results:
-            try:
-                score = int(score_str)
-                # Keywords are stored as a comma-space separated string: "cost, living, high, ..."
-                keywords = [k.strip() for k in keywords_str.split(',')]
-                
-                for keyword in keywords:
-                    if keyword:
-                        self.keyword_sentiment[keyword][0] += 1  # Increment count
-                        self.keyword_sentiment[keyword][1] += score # Add score
-            except ValueError:
-                # Skip invalid score_str just in case
-                continue
+        for keyword, count, score_sum in cursor.fetchall():
+            self.keyword_sentiment[keyword] = [count, score_sum]
 
         cursor.close()
-        print(f"✅ Loaded {len(results)} responses. Analyzed {len(self.keyword_sentiment)} unique keywords.")
+        print(f"✅ Analyzed {len(self.keyword_sentiment)} unique keywords.")
+
+    def responses_mentioning(self, keyword, limit=5):
+        """The user's most recent answers whose keywords include `keyword` (GIN index on senatair_responses.keywords)."""
+        cursor = self.db_conn.cursor()
+        cursor.execute("""
+            SELECT bill_number, question_text, answer_text, created_at
+            FROM senatair_responses
+            WHERE senatair_id = %s AND keywords @> ARRAY[%s]::text[]
+            ORDER BY created_at DESC
+            LIMIT %s
+        """, (self.user_id, keyword, limit))
+        responses = cursor.fetchall()
+        cursor.close()
+        return responses
 
     def calculate_average_sentiments(self):
         """Calculates the weighted average score for each keyword."""
@@ -83,14 +94,35 @@ class PersonalizedPredictor:
         prediction_score = total_score / total_weight
         
         # Convert the numeric score back to a user-friendly prediction
-        if prediction_score < 2.5:
-            stance = "Likely Oppose"
-        elif prediction_score < 3.5:
-            stance = "Neutral/Uncertain"
-        else:
-            stance = "Likely Support"
-            
-        return prediction_score, stance
+        return prediction_score, stance_label(prediction_score)
+
+    def rank_all_bills(self, matrix=None):
+        """
+        Batch version of predict_bill_stance for every bill at once: two sparse
+        matrix-vector products over the bill x keyword matrix (see bill_keyword_matrix.py).
+
+        Returns a list of dicts sorted from most likely support to most likely oppose;
+        bills with no matching sentiment data come last at the neutral 3.0.
+        """
+        matrix = matrix or bill_keyword_matrix.get_matrix(self.db_conn)
+        scores, weights = matrix.stance_scores(self.keyword_sentiment)
+
+        # Primary key last: bills with data first, then highest score, then most evidence
+        order = np.lexsort((-weights, -scores, weights == 0))
+
+        ranked = []
+        for i in order:
+            if weights[i] == 0:
+                stance = "Neutral (No prior matching sentiment data)"
+            else:
+                stance = stance_label(scores[i])
+            ranked.append({
+                'bill_number': matrix.bill_numbers[i],
+                'score': float(scores[i]),
+                'stance': stance,
+                'weight': float(weights[i])
+            })
+        return ranked
 
     def run_prediction_demo(self):
         """Runs a demonstration of the prediction model."""
@@ -104,6 +136,12 @@ class PersonalizedPredictor:
         for keyword, score in sorted_sentiments[:5]:
             count = self.keyword_sentiment[keyword][0]
             print(f"📊 '{keyword}': Avg Score {score:.2f} ({count} responses)")
+
+        if sorted_sentiments:
+            top_keyword = sorted_sentiments[0][0]
+            print(f"\n🔎 Latest answers mentioning '{top_keyword}':")
+            for bill_number, question_text, answer_text, created_at in self.responses_mentioning(top_keyword, 3):
+                print(f"   {created_at} [{bill_number or 'meta'}] {question_text[:60]} -> {answer_text}")
         
         print("\n-------------------------------------------")
         print("🧠 Predicting User Stance on an UNSEEN Bill...")
@@ -127,11 +165,24 @@ class PersonalizedPredictor:
         print(f"Keywords: {', '.join(test_bill_keywords_2)}")
         print(f"PREDICTION: {pred_stance_2} (Score: {pred_score_2:.2f} on 1-5 scale)")
 
+        # --- DEMO 3: Every bill at once ---
+        started = time.perf_counter()
+        ranked = self.rank_all_bills()
+        elapsed = time.perf_counter() - started
+        scored = [bill for bill in ranked if bill['weight'] > 0]
+
+        print(f"\n--- DEMO 3: All {len(ranked)} bills ranked in {elapsed * 1000:.1f} ms ({len(scored)} with matching data) ---")
+        for bill in scored[:3]:
+            print(f"👍 {bill['bill_number']}: {bill['stance']} (Score: {bill['score']:.2f})")
+        for bill in scored[-3:][::-1]:
+            print(f"👎 {bill['bill_number']}: {bill['stance']} (Score: {bill['score']:.2f})")
+
 
     def __del__(self):
-        """Ensure the database connection is closed."""
-        if self.db_conn:
-            self.db_conn.close()
+        """Ensure the database connection goes back to the pool."""
+        if getattr(self, 'db_conn', None):
+            db_pool.release(self.db_conn)
+            self.db_conn = None
 
 if __name__ == "__main__":
     # Use the Test User ID you've been using
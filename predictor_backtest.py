@@ -0,0 +1,312 @@
+# predictor_backtest.py
+"""
+Offline backtest for the vote predictors.
+
+Replays history in time order. Scored survey answers (senatair_responses,
+answer_text '1'-'5') are fed to every predictor as they happened. Each time
+a senatair cast a real vote (votes table written by the persistent node's
+/vote page, Yes/No), every predictor first predicts that vote from what it
+has seen so far, and only then is the vote revealed.
+
+Predictors compared:
+    PersonalizedPredictor v3   personalized_predictor3.py (keyword sentiment)
+    VotePredictor v8           archive/vote_predictor8.py (response normalization + bill sentiment)
+    VotePredictor v5 simple    archive/vote_predictor5.py (answers whose question words appear in the bill)
+
+Reported per predictor:
+    accuracy     correct / decisive (Yes/No) predictions
+    coverage     decisive predictions / votes
+    brier        mean (P(Yes) - outcome)^2 over all votes (abstentions count as P = 0.5)
+    ece          expected calibration error over 10 probability bins
+    pred/s       predictions per second (prediction calls only)
+
+    python predictor_backtest.py
+    python predictor_backtest.py --since 2025-01-01 --store     # append results to predictor_modules.accuracy_history
+"""
+import argparse
+import heapq
+import importlib.util
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import db_pool
+from personalized_predictor3 import PersonalizedPredictor
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive')
+
+RESPONSES_SQL = """
+    SELECT created_at, senatair_id, bill_number, question_type, question_text, answer_text, keywords
+    FROM senatair_responses
+    WHERE senatair_id IS NOT NULL
+      AND answer_text IN ('1', '2', '3', '4', '5')
+      AND created_at >= %(since)s
+    ORDER BY created_at, id
+"""
+
+VOTES_SQL = """
+    SELECT timestamp, user_id, bill_id, vote
+    FROM votes
+    WHERE vote IN ('Yes', 'No')
+      AND timestamp >= %(since)s
+    ORDER BY timestamp, id
+"""
+
+
+def load_archive_module(name):
+    """Imports an archived predictor by file name (archive/ is not a package)."""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ARCHIVE_DIR, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# --- Predictor adapters ---
+# observe(response) sees one historical answer; predict(user_id, bill) returns (vote, p_yes)
+# with vote in 'Yes' / 'No' / 'Abstain' and p_yes in [0, 1].
+
+class PersonalizedPredictorAdapter:
+    module_name = 'PersonalizedPredictor v3'
+
+    def __init__(self):
+        # No database connection: the sentiment profile is rebuilt online from the replay
+        self.predictor = PersonalizedPredictor.__new__(PersonalizedPredictor)
+        self.sentiment = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+
+    def observe(self, response):
+        for keyword in response['keywords']:
+            self.sentiment[response['user_id']][keyword][0] += 1
+            self.sentiment[response['user_id']][keyword][1] += response['score']
+
+    def predict(self, user_id, bill):
+        self.predictor.keyword_sentiment = self.sentiment[user_id]
+        score, stance = self.predictor.predict_bill_stance(
+            bill['keywords'], self.predictor.calculate_average_sentiments())
+        vote = {'Likely Support': 'Yes', 'Likely Oppose': 'No'}.get(stance, 'Abstain')
+        return vote, (score - 1.0) / 4.0
+
+
+class VotePredictor8Adapter:
+    module_name = 'VotePredictor v8'
+
+    def __init__(self):
+        self.predictor = load_archive_module('vote_predictor8').VotePredictor()
+        self.answers = defaultdict(list)  # (user_id, bill_number) -> [(score, question_type)]
+
+    def observe(self, response):
+        if response['bill_number']:
+            self.answers[(response['user_id'], response['bill_number'])].append(
+                (response['score'], response['question_type']))
+
+    def predict(self, user_id, bill):
+        answers = self.answers.get((user_id, bill['number']), [])
+        vote = self.predictor.predict_from_responses(
+            [score for score, _ in answers], bill['text'], [q_type for _, q_type in answers])
+        return {'Yes': ('Yes', 1.0), 'No': ('No', 0.0)}.get(vote, ('Abstain', 0.5))
+
+
+class VotePredictor5Adapter:
+    module_name = 'VotePredictor v5 simple'
+
+    def __init__(self):
+        module = load_archive_module('vote_predictor5')
+        # Its __init__ opens (and resets) a local SQLite file; the prediction methods don't need it
+        self.predictor = module.VotePredictor.__new__(module.VotePredictor)
+        self.answers = defaultdict(list)
+
+    def observe(self, response):
+        self.answers[response['user_id']].append({
+            'question': response['question_text'] or '',
+            'type': 'scale_1_to_5',
+            'answer': response['answer_text'],
+            'score': response['score']
+        })
+
+    def predict(self, user_id, bill):
+        vote, _ = self.predictor.predict_vote_simple(bill['text'], self.answers[user_id])
+        return {'yes': ('Yes', 1.0), 'no': ('No', 0.0)}.get(vote, ('Abstain', 0.5))
+
+
+PREDICTORS = (PersonalizedPredictorAdapter, VotePredictor8Adapter, VotePredictor5Adapter)
+
+
+class BacktestResult:
+    def __init__(self, module_name, bins=10):
+        self.module_name = module_name
+        self.bins = bins
+        self.votes = 0
+        self.decisive = 0
+        self.correct = 0
+        self.brier_sum = 0.0
+        self.predict_seconds = 0.0
+        self.observe_seconds = 0.0
+        self.bin_counts = [0] * bins
+        self.bin_p_sum = [0.0] * bins
+        self.bin_yes = [0] * bins
+
+    def record(self, vote, p_yes, actual):
+        outcome = 1.0 if actual == 'Yes' else 0.0
+        p_yes = min(max(p_yes, 0.0), 1.0)
+        self.votes += 1
+        if vote != 'Abstain':
+            self.decisive += 1
+            self.correct += vote == actual
+        self.brier_sum += (p_yes - outcome) ** 2
+        b = min(int(p_yes * self.bins), self.bins - 1)
+        self.bin_counts[b] += 1
+        self.bin_p_sum[b] += p_yes
+        self.bin_yes[b] += outcome
+
+    def summary(self):
+        ece = sum(
+            abs(self.bin_p_sum[b] / n - self.bin_yes[b] / n) * n / self.votes
+            for b, n in enumerate(self.bin_counts) if n
+        ) if self.votes else 0.0
+        return {
+            'votes': self.votes,
+            'accuracy': self.correct / self.decisive if self.decisive else None,
+            'coverage': self.decisive / self.votes if self.votes else None,
+            'brier': self.brier_sum / self.votes if self.votes else None,
+            'ece': ece,
+            'predictions_per_sec': self.votes / self.predict_seconds if self.predict_seconds else None,
+            'reliability': [
+                {'bin': f"{b / self.bins:.1f}-{(b + 1) / self.bins:.1f}", 'count': n,
+                 'mean_p_yes': self.bin_p_sum[b] / n, 'observed_yes': self.bin_yes[b] / n}
+                for b, n in enumerate(self.bin_counts) if n
+            ]
+        }
+
+
+def load_bills(conn):
+    """{bill_number: {'number', 'keywords': [...], 'text': title + summary}}"""
+    cursor = conn.cursor()
+    bills = {}
+    cursor.execute("""
+        SELECT b.number, COALESCE(b.short_title_en, ''),
+               COALESCE((SELECT string_agg(bt.summary_en, ' ') FROM bills_billtext bt WHERE bt.bill_id = b.id), '')
+        FROM bills_bill b
+        WHERE b.number IS NOT NULL
+    """)
+    for number, title, summary in cursor.fetchall():
+        bills[number] = {'number': number, 'keywords': [], 'text': f"{title} {summary}".strip()}
+
+    # One list entry per bill_keywords row, the same multiplicity predict_bill_stance expects
+    cursor.execute("SELECT bill_number, keyword FROM bill_keywords WHERE bill_number IS NOT NULL AND keyword IS NOT NULL")
+    for number, keyword in cursor.fetchall():
+        if number in bills:
+            bills[number]['keywords'].append(keyword)
+    cursor.close()
+    return bills
+
+
+def _stream(conn, name, sql, since, itersize=5000):
+    """Server-side cursor so long histories are streamed rather than loaded at once."""
+    cursor = conn.cursor(name=name)
+    cursor.itersize = itersize
+    cursor.execute(sql, {'since': since})
+    try:
+        yield from cursor
+    finally:
+        cursor.close()
+
+
+def run_backtest(since=datetime(1970, 1, 1), predictor_classes=PREDICTORS):
+    predictors = [cls() for cls in predictor_classes]
+    results = {p.module_name: BacktestResult(p.module_name) for p in predictors}
+
+    with db_pool.connection() as conn:
+        bills = load_bills(conn)
+        responses = (
+            (row[0], 0, {'user_id': row[1], 'bill_number': row[2], 'question_type': row[3],
+                         'question_text': row[4], 'answer_text': row[5], 'score': int(row[5]),
+                         'keywords': row[6] or []})
+            for row in _stream(conn, 'backtest_responses', RESPONSES_SQL, since)
+        )
+        # Ties: answers at the same instant as a vote were given before it (sort key 0 < 1)
+        votes = (
+            (row[0], 1, {'user_id': row[1], 'bill_number': row[2], 'vote': row[3]})
+            for row in _stream(conn, 'backtest_votes', VOTES_SQL, since)
+        )
+
+        skipped = 0
+        for _, kind, event in heapq.merge(responses, votes, key=lambda item: (item[0], item[1])):
+            if kind == 0:
+                for predictor in predictors:
+                    started = time.perf_counter()
+                    predictor.observe(event)
+                    results[predictor.module_name].observe_seconds += time.perf_counter() - started
+                continue
+
+            bill = bills.get(event['bill_number'])
+            if bill is None:
+                skipped += 1
+                continue
+            for predictor in predictors:
+                result = results[predictor.module_name]
+                started = time.perf_counter()
+                vote, p_yes = predictor.predict(event['user_id'], bill)
+                result.predict_seconds += time.perf_counter() - started
+                result.record(vote, p_yes, event['vote'])
+
+    if skipped:
+        print(f"ℹ️  Skipped {skipped} votes on bills missing from bills_bill.")
+    return {name: result.summary() for name, result in results.items()}
+
+
+def print_results(summaries):
+    print("\n🧪 PREDICTOR BACKTEST")
+    print("=" * 86)
+    print(f"{'predictor':<28}{'votes':>8}{'accuracy':>10}{'coverage':>10}{'brier':>8}{'ece':>8}{'pred/s':>12}")
+
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else '-'
+
+    for name, s in summaries.items():
+        print(f"{name:<28}{s['votes']:>8}{fmt(s['accuracy'], '.1%'):>10}{fmt(s['coverage'], '.1%'):>10}"
+              f"{fmt(s['brier'], '.3f'):>8}{s['ece']:>8.3f}{fmt(s['predictions_per_sec'], ',.0f'):>12}")
+
+
+def store_results(summaries, since):
+    """Appends each result to predictor_modules.accuracy_history (a JSON list, newest last)."""
+    with db_pool.transaction() as conn:
+        cursor = conn.cursor()
+        for name, summary in summaries.items():
+            cursor.execute("""
+                INSERT INTO predictor_modules (module_name, module_description, version)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (module_name) DO NOTHING
+            """, (name, 'Registered by predictor_backtest.py', None))
+            cursor.execute("SELECT accuracy_history FROM predictor_modules WHERE module_name = %s FOR UPDATE", (name,))
+            try:
+                history = json.loads(cursor.fetchone()[0] or '[]')
+            except ValueError:
+                history = []  # Placeholder text such as 'No historical data yet'
+            if not isinstance(history, list):
+                history = []
+            entry = {key: value for key, value in summary.items() if key != 'reliability'}
+            entry.update({'run_at': datetime.now().isoformat(timespec='seconds'), 'since': since.isoformat(),
+                          'source': 'predictor_backtest.py'})
+            history.append(entry)
+            cursor.execute("UPDATE predictor_modules SET accuracy_history = %s WHERE module_name = %s",
+                           (json.dumps(history), name))
+        cursor.close()
+    print("💾 Results appended to predictor_modules.accuracy_history")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay history and score every vote predictor")
+    parser.add_argument('--since', type=datetime.fromisoformat, default=datetime(1970, 1, 1),
+                        help="only replay events from this date (YYYY-MM-DD)")
+    parser.add_argument('--store', action='store_true', help="append results to predictor_modules.accuracy_history")
+    parser.add_argument('--json', help="also write the full results (with reliability tables) to this file")
+    args = parser.parse_args()
+
+    summaries = run_backtest(args.since)
+    print_results(summaries)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summaries, f, indent=2)
+    if args.store:
+        store_results(summaries, args.since)
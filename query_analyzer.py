@@ -0,0 +1,141 @@
+# query_analyzer.py
+"""
+Query-time keyword extraction for the adaptive survey.
+
+find_relevant_bills only needs NOUN/PROPN/ADJ lemmas plus a few entity types,
+so the dependency parser is never loaded. Frequent words are remembered in a
+bounded LRU (word -> lemma, POS); when every word of a query is already known
+the tagger and lemmatizer are skipped and only NER runs.
+
+Run `python query_analyzer.py` for a startup / per-query benchmark.
+"""
+import time
+from collections import OrderedDict
+
+import spacy
+
+KEYWORD_POS = ('NOUN', 'PROPN', 'ADJ')
+KEYWORD_ENTITY_LABELS = ('ORG', 'GPE', 'PERSON', 'LAW')
+
+# Components find_relevant_bills never reads. NER in en_core_web_sm has its own
+# internal tok2vec, so it keeps working without the shared one or the parser.
+QUERY_EXCLUDED_PIPES = ['parser', 'senter']
+
+
+class LemmaCache:
+    """Bounded LRU of word -> (lemma, pos)."""
+
+    def __init__(self, maxsize=5000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, word):
+        entry = self._entries.get(word)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(word)
+        self.hits += 1
+        return entry
+
+    def put(self, word, lemma, pos):
+        self._entries[word] = (lemma, pos)
+        self._entries.move_to_end(word)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class QueryAnalyzer:
+    def __init__(self, model="en_core_web_sm", cache_size=5000):
+        self.nlp = spacy.load(model, exclude=QUERY_EXCLUDED_PIPES)
+        self.ner = self.nlp.get_pipe('ner') if 'ner' in self.nlp.pipe_names else None
+        self.cache = LemmaCache(cache_size)
+
+    def _analyze(self, text):
+        """Returns (doc, [(token, lemma, pos), ...]) using the cache when it covers every word."""
+        doc = self.nlp.make_doc(text)
+        cached = [self.cache.get(token.text) for token in doc]
+
+        if self.ner is not None and all(entry is not None for entry in cached):
+            doc = self.ner(doc)
+            return doc, [(token, lemma, pos) for token, (lemma, pos) in zip(doc, cached)]
+
+        doc = self.nlp(text)
+        analyzed = []
+        for token in doc:
+            lemma = token.lemma_.lower()
+            self.cache.put(token.text, lemma, token.pos_)
+            analyzed.append((token, lemma, token.pos_))
+        return doc, analyzed
+
+    def extract_keywords(self, user_input):
+        """Same keyword rules as the original find_relevant_bills."""
+        doc, analyzed = self._analyze(user_input.lower())
+
+        keywords = []
+        for token, lemma, pos in analyzed:
+            if (pos in KEYWORD_POS and
+                not token.is_stop and
+                len(token.text) > 3):
+                keywords.append(lemma)
+        for ent in doc.ents:
+            if ent.label_ in KEYWORD_ENTITY_LABELS:
+                keywords.append(ent.text.lower())
+        return keywords
+
+
+def run_benchmark(queries=None, repeats=20):
+    """Compares the full pipeline with the trimmed, cached query analyzer."""
+    queries = queries or [
+        "I am concerned about the rising cost of housing and lack of affordable childcare.",
+        "Rent is too high in Toronto and landlords keep raising it",
+        "high rent",
+        "The carbon tax is hurting farmers in Saskatchewan",
+        "Why does the RCMP need more surveillance powers?",
+        "Healthcare wait times in Nova Scotia are unacceptable",
+    ]
+
+    print("⏱️  SENATAI QUERY NLP BENCHMARK")
+    print("=" * 40)
+
+    started = time.perf_counter()
+    full_nlp = spacy.load("en_core_web_sm")
+    full_load = time.perf_counter() - started
+
+    started = time.perf_counter()
+    analyzer = QueryAnalyzer()
+    trimmed_load = time.perf_counter() - started
+
+    print(f"Cold start (full pipeline):    {full_load * 1000:.0f} ms  {full_nlp.pipe_names}")
+    print(f"Cold start (query analyzer):   {trimmed_load * 1000:.0f} ms  {analyzer.nlp.pipe_names}")
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for query in queries:
+            full_nlp(query.lower())
+    full_per_query = (time.perf_counter() - started) / (repeats * len(queries))
+
+    started = time.perf_counter()
+    for query in queries:
+        analyzer.extract_keywords(query)
+    cold_per_query = (time.perf_counter() - started) / len(queries)
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for query in queries:
+            analyzer.extract_keywords(query)
+    warm_per_query = (time.perf_counter() - started) / (repeats * len(queries))
+
+    print(f"Per query (full pipeline):     {full_per_query * 1000:.2f} ms")
+    print(f"Per query (analyzer, cold):    {cold_per_query * 1000:.2f} ms")
+    print(f"Per query (analyzer, cached):  {warm_per_query * 1000:.2f} ms")
+    print(f"Lemma cache: {len(analyzer.cache)} words, {analyzer.cache.hits} hits / {analyzer.cache.misses} misses")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,278 @@
+# response_journal.py
+"""
+Write-behind journal for senatair_responses.
+
+save_response appends each answer to a local append-only journal (one JSON
+line, fsynced) and returns immediately. Buffered answers are written to
+Postgres in one multi-row INSERT when any of these happens:
+
+  * the buffer reaches max_batch answers
+  * the oldest buffered answer is older than max_age seconds (background thread)
+  * flush() is called (session end / 'quit' / interpreter exit)
+
+Each answer carries a journal_id (UUID, unique in senatair_responses), so
+replaying the journal after a crash never inserts the same answer twice.
+
+Every process writes its own journal (data/response_journal.<pid>.<uuid>.jsonl)
+and holds an exclusive flock on it for its lifetime, so a flush only ever
+truncates that process's file. On startup a journal replays the orphaned
+files of processes that are gone (the ones whose lock it can take) and
+deletes them once their answers are committed.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+
+import psycopg2
+import psycopg2.extras
+
+import perf_metrics
+
+DEFAULT_JOURNAL_DIR = os.environ.get(
+    'SENATAI_RESPONSE_JOURNAL_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+)
+
+# Per-process journals; the pattern also matches the single shared file older versions wrote
+JOURNAL_PATTERN = 'response_journal*.jsonl'
+
+RESPONSE_COLUMNS = (
+    'journal_id', 'senatair_id', 'session_id', 'question_text', 'answer_text',
+    'bill_number', 'question_type', 'keywords', 'is_meta', 'created_at'
+)
+
+
+def record_keywords(record):
+    """
+    Keyword list for the senatair_responses.keywords TEXT[] column (None when empty:
+    psycopg2 cannot type an empty array literal). Journals written before the column
+    existed carry the old comma-joined matched_keywords string instead.
+    """
+    keywords = record.get('keywords')
+    if keywords is None and record.get('matched_keywords'):
+        keywords = record['matched_keywords'].split(',')
+    keywords = [keyword.strip() for keyword in keywords or [] if keyword and keyword.strip()]
+    return keywords or None
+
+
+class ResponseJournal:
+    def __init__(self, transaction, path=None, max_batch=25, max_age=5.0, journal_dir=DEFAULT_JOURNAL_DIR):
+        """
+        Args:
+            transaction: context manager factory yielding a connection and committing
+                         on success (db_pool.transaction). Each flush checks out its
+                         own connection, so background flushes never interleave with
+                         the caller's transactions.
+            path: journal file for this process (default: a new uniquely named file
+                  in journal_dir). Raises RuntimeError if another live process holds it.
+            max_batch: flush once this many answers are buffered
+            max_age: flush once the oldest buffered answer is this many seconds old
+            journal_dir: directory searched for orphaned journals (and where the
+                         default journal is created)
+        """
+        self._transaction = transaction
+        self.journal_dir = os.path.abspath(journal_dir if path is None else os.path.dirname(os.path.abspath(path)))
+        self.max_batch = max_batch
+        self.max_age = max_age
+
+        self._lock = threading.RLock()
+        self._buffer = []
+        self._oldest = None
+
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self._journal = self._open_own_journal(path)
+        self.path = self._journal.name
+        self.replay()
+
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name='response-journal', daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def append(self, record):
+        """Durably journals one response. Returns the record's journal_id."""
+        record = dict(record)
+        record.setdefault('journal_id', str(uuid.uuid4()))
+
+        with self._lock:
+            self._journal.write(json.dumps(record, default=str) + '\n')
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+
+            self._buffer.append(record)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+
+            if len(self._buffer) >= self.max_batch:
+                self.flush()
+
+        return record['journal_id']
+
+    def flush(self):
+        """Writes every buffered answer in one transaction. Returns False if the DB is unavailable."""
+        with self._lock:
+            if not self._buffer:
+                return True
+
+            try:
+                with perf_metrics.stage('journal flush'), self._transaction() as conn:
+                    self._write_batch(conn, self._buffer)
+            except psycopg2.Error as e:
+                print(f"⚠️  Response journal flush failed, answers kept on disk for retry: {e}")
+                return False
+
+            self._buffer = []
+            self._oldest = None
+            self._journal.seek(0)
+            self._journal.truncate()
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            return True
+
+    def _write_batch(self, conn, records):
+        cursor = conn.cursor()
+        try:
+            psycopg2.extras.execute_values(cursor, f"""
+                INSERT INTO senatair_responses ({', '.join(RESPONSE_COLUMNS)})
+                VALUES %s
+                ON CONFLICT (journal_id) DO NOTHING
+            """, [
+                tuple(record_keywords(record) if column == 'keywords' else record.get(column)
+                      for column in RESPONSE_COLUMNS)
+                for record in records
+            ])
+
+            # Interest counters: only the first answer per (senatair, session, bill) counts.
+            interest_rows = {
+                (record['senatair_id'], record['session_id'], record['bill_number'])
+                for record in records
+                if record.get('bill_number') and not record.get('is_meta')
+            }
+            if interest_rows:
+                psycopg2.extras.execute_values(cursor, """
+                    WITH first_answers AS (
+                        INSERT INTO bill_interest_sessions (senatair_id, session_id, bill_number)
+                        VALUES %s
+                        ON CONFLICT DO NOTHING
+                        RETURNING bill_number
+                    )
+                    INSERT INTO bill_interest (bill_number, interest_count)
+                    SELECT bill_number, COUNT(*) FROM first_answers GROUP BY bill_number
+                    ON CONFLICT (bill_number) DO UPDATE
+                    SET interest_count = bill_interest.interest_count + EXCLUDED.interest_count,
+                        last_updated = CURRENT_TIMESTAMP
+                """, list(interest_rows), page_size=len(interest_rows))
+        finally:
+            cursor.close()
+
+    def _open_own_journal(self, path):
+        """Opens (and flocks) this process's journal file."""
+        if path is None:
+            name = f"response_journal.{os.getpid()}.{uuid.uuid4().hex}.jsonl"
+            # Created and locked under a name replay() does not match, then renamed,
+            # so no other process can take it for an orphan while it is still empty.
+            temp_path = os.path.join(self.journal_dir, '.' + name + '.tmp')
+            journal = open(temp_path, 'a+', encoding='utf-8')
+            fcntl.flock(journal.fileno(), fcntl.LOCK_EX)
+            path = os.path.join(self.journal_dir, name)
+            os.rename(temp_path, path)
+            journal.close()
+
+        journal = open(path, 'a+', encoding='utf-8')
+        try:
+            fcntl.flock(journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            journal.close()
+            raise RuntimeError(f"Response journal {path} is in use by another process")
+        return journal
+
+    @staticmethod
+    def _read_records(f):
+        f.seek(0)
+        records = []
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue # Torn final line from a crash mid-write
+        return records
+
+    def replay(self):
+        """
+        Re-sends answers left behind by earlier runs (e.g. after a crash): what is
+        already in this process's own journal, then every orphaned journal in
+        journal_dir whose owner is gone. Returns the number of answers sent.
+        """
+        replayed = 0
+
+        with self._lock:
+            records = self._read_records(self._journal)
+            if records:
+                # Kept in the buffer (and on disk) until they are committed
+                self._buffer = records
+                self._oldest = time.monotonic()
+                if self.flush():
+                    replayed += len(records)
+
+        for orphan_path in sorted(glob.glob(os.path.join(self.journal_dir, JOURNAL_PATTERN))):
+            if os.path.abspath(orphan_path) == os.path.abspath(self.path):
+                continue
+            replayed += self._replay_orphan(orphan_path)
+
+        if replayed:
+            print(f"♻️  Replayed {replayed} journaled answers from a previous session.")
+        return replayed
+
+    def _replay_orphan(self, path):
+        """Sends and deletes another process's journal if that process is gone (its lock is free)."""
+        try:
+            f = open(path, 'r', encoding='utf-8')
+        except OSError:
+            return 0 # Already claimed and removed by another process
+        try:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0 # Owner still running
+            try:
+                if os.stat(path).st_ino != os.fstat(f.fileno()).st_ino:
+                    return 0 # Replayed and deleted by another process while we waited
+            except FileNotFoundError:
+                return 0
+
+            records = self._read_records(f)
+            if records:
+                try:
+                    with self._transaction() as conn:
+                        self._write_batch(conn, records)
+                except psycopg2.Error as e:
+                    print(f"⚠️  Could not replay {len(records)} journaled answers from {path} yet: {e}")
+                    return 0
+            os.unlink(path)
+            return len(records)
+        finally:
+            f.close()
+
+    def _flush_periodically(self):
+        while not self._stopped.wait(min(1.0, self.max_age)):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.max_age
+            if due:
+                self.flush()
+
+    def close(self):
+        """Final flush on session end / quit."""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        flushed = self.flush()
+        with self._lock:
+            if flushed:
+                # Nothing left to replay: remove the file while we still hold its lock
+                os.unlink(self.path)
+            self._journal.close()
@@ -0,0 +1,98 @@
+# search_cache.py
+"""
+Result cache for bill search, keyed on the normalized keyword set.
+
+"rent too high" and "high rent" both reduce to ('high', 'rent'), so the second
+query skips ranking and hydration entirely. Entries expire after ttl seconds,
+the least recently used entry is evicted past maxsize, and the whole cache is
+dropped when the search data version changes (bill_keywords or bill text
+updated; see search_data_version in database_schema_template.sql).
+"""
+import time
+from collections import OrderedDict
+
+
+def normalize_keywords(keywords):
+    """Order- and duplicate-insensitive cache key for a keyword list."""
+    return tuple(sorted({keyword.strip().lower() for keyword in keywords if keyword and keyword.strip()}))
+
+
+class SearchCache:
+    def __init__(self, maxsize=512, ttl=600.0, version_source=None, version_check_interval=5.0):
+        """
+        Args:
+            maxsize: maximum number of cached searches
+            ttl: seconds an entry stays valid
+            version_source: zero-argument callable returning the current data version
+                            (any comparable value, None if unknown)
+            version_check_interval: seconds between version_source calls
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version_source = version_source
+        self.version_check_interval = version_check_interval
+
+        self._entries = OrderedDict()
+        self._version = None
+        self._last_version_check = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self):
+        if self.version_source is None:
+            return
+        now = time.monotonic()
+        if now - self._last_version_check < self.version_check_interval:
+            return
+        self._last_version_check = now
+
+        version = self.version_source()
+        if version is None:
+            return
+        if self._version is not None and version != self._version:
+            self.invalidate()
+        self._version = version
+
+    def get(self, key):
+        self._check_version()
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self):
+        self._entries.clear()
+        self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
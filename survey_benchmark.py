@@ -0,0 +1,286 @@
+# survey_benchmark.py
+"""
+Headless replay / latency benchmark for AdaptiveSurveyV11.run_survey.
+
+Drives complete survey sessions with scripted answers instead of input()
+prompts, runs them concurrently and reports p50/p95/p99 latency per stage:
+
+    nlp         keyword extraction (QueryAnalyzer.extract_keywords)
+    search      find_relevant_bills end to end (includes search cache hits)
+    ranking     keyword index top_k            } when the mmap index is used
+    hydration   get_bills_details              }
+    rank+hydr   single ranking + hydration SQL statement (SQL / fulltext / blend modes)
+    interest    get_interest_counts
+    save        save_response (journal append, plus any size-triggered flush)
+    flush       ResponseJournal.flush (batched INSERT into senatair_responses)
+    session     one whole scripted session
+
+Sessions come from a JSONL file (one session per line) or are synthesized:
+
+    {"concerns": ["rent is too high", "carbon tax"], "relevance": "A", "answers": ["1", "4", "skip"]}
+
+    concerns   typed at the main prompt, one per round; the session quits after the last
+    relevance  answer to the relevance check (bill number, A or B; default A)
+    answers    consumed in order by question / check-in prompts, then random 1-5
+
+Saved answers really are written, so point DATABASE_URL at a staging copy
+of the database. Each worker journals to its own temporary file.
+
+    python survey_benchmark.py --sessions 200 --workers 8
+    python survey_benchmark.py --script sessions.jsonl --mode blend --json results.json
+    python survey_benchmark.py --no-cache --max-p95 search=250 --max-p95 save=20
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+
+SYNTHETIC_CONCERNS = [
+    "I am concerned about the rising cost of housing and lack of affordable childcare.",
+    "Rent is too high in Toronto and landlords keep raising it",
+    "high rent",
+    "The carbon tax is hurting farmers in Saskatchewan",
+    "Why does the RCMP need more surveillance powers?",
+    "Healthcare wait times in Nova Scotia are unacceptable",
+    "Grocery prices keep going up and wages are not keeping pace",
+    "Online news and social media platforms should pay journalists",
+    "Firearms regulation for hunters and sport shooters",
+    "Pharmacare and the price of prescription drugs",
+    "Immigration levels and the shortage of family doctors",
+    "Pipeline approvals and Indigenous consultation",
+]
+
+STAGE_ORDER = ('nlp', 'search', 'ranking', 'hydration', 'rank+hydr', 'interest', 'save', 'flush', 'session')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class StageTimings:
+    """Thread-safe collection of per-stage durations (seconds)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def wrap(self, obj, attr, stage):
+        """Replaces obj.attr with a timed wrapper (instance attribute only)."""
+        original = getattr(obj, attr)
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+
+        setattr(obj, attr, timed)
+
+    def summary(self):
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self.samples.items()}
+        ordered = [stage for stage in STAGE_ORDER if stage in samples]
+        ordered += sorted(stage for stage in samples if stage not in STAGE_ORDER)
+
+        summary = {}
+        for stage in ordered:
+            values = samples[stage]
+            summary[stage] = {
+                'count': len(values),
+                'mean_ms': sum(values) / len(values) * 1000,
+                'p50_ms': percentile(values, 50) * 1000,
+                'p95_ms': percentile(values, 95) * 1000,
+                'p99_ms': percentile(values, 99) * 1000,
+                'max_ms': values[-1] * 1000
+            }
+        return summary
+
+
+class ScriptedSession:
+    """input() replacement that answers each survey prompt from a session script."""
+
+    def __init__(self, script, rng):
+        self.concerns = list(script.get('concerns') or [])
+        self.relevance = str(script.get('relevance', 'A'))
+        self.answers = [str(answer) for answer in script.get('answers') or []]
+        self.rng = rng
+
+    def __call__(self, prompt=''):
+        if prompt.startswith('Your choice (Bill Number'):
+            return self.relevance
+        if 'Your choice (1-5' in prompt:
+            return self.answers.pop(0) if self.answers else str(self.rng.randint(1, 5))
+        if prompt == '\n> ':
+            return self.concerns.pop(0) if self.concerns else 'quit'
+        if prompt == '> ':
+            return 'no'  # Registration prompt
+        return 'quit'
+
+
+def synthetic_sessions(count, rng, rounds=2):
+    for _ in range(count):
+        yield {
+            'concerns': rng.sample(SYNTHETIC_CONCERNS, rounds),
+            'relevance': 'A',
+            'answers': [str(rng.choice([1, 2, 3, 4, 5, 'skip'])) for _ in range(8 * rounds)]
+        }
+
+
+def load_sessions(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def instrument(survey, timings):
+    """Times the survey stages on this instance only."""
+    timings.wrap(survey.query_analyzer, 'extract_keywords', 'nlp')
+    timings.wrap(survey, 'find_relevant_bills', 'search')
+    if survey.keyword_index and survey.search_mode == 'keywords':
+        timings.wrap(survey.keyword_index, 'top_k', 'ranking')
+        timings.wrap(survey, 'get_bills_details', 'hydration')
+    else:
+        timings.wrap(survey, '_search_bills', 'rank+hydr')
+    timings.wrap(survey, 'get_interest_counts', 'interest')
+    timings.wrap(survey, 'save_response', 'save')
+    timings.wrap(survey.response_journal, 'flush', 'flush')
+
+
+def run_worker(worker_id, jobs, timings, options, journal_dir, errors):
+    from adaptive_survey11 import AdaptiveSurveyV11
+
+    try:
+        survey = AdaptiveSurveyV11(
+            search_mode=options.mode,
+            journal_path=os.path.join(journal_dir, f'worker_{worker_id}.jsonl')
+        )
+    except Exception as e:
+        errors.append(f"worker {worker_id} could not start: {e}")
+        return
+    if options.no_cache:
+        survey.search_cache.maxsize = 0  # Every put is evicted immediately: always measure the cold path
+    instrument(survey, timings)
+    rng = random.Random(options.seed + worker_id)
+
+    while True:
+        try:
+            session_number, script = jobs.get_nowait()
+        except queue.Empty:
+            break
+        survey.input_func = ScriptedSession(script, rng)
+        started = time.perf_counter()
+        try:
+            survey.run_survey(user_id=options.user_id, session_id=options.session_base + session_number)
+        except Exception as e:
+            errors.append(f"session {session_number}: {e}")
+        timings.record('session', time.perf_counter() - started)
+
+    survey.response_journal.close()
+
+
+def print_report(summary, elapsed, sessions, errors, out=sys.stdout):
+    print("\n⏱️  SENATAI SURVEY REPLAY BENCHMARK", file=out)
+    print("=" * 72, file=out)
+    print(f"{'stage':<11}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}   (ms)", file=out)
+    for stage, row in summary.items():
+        print(f"{stage:<11}{row['count']:>8}{row['mean_ms']:>10.2f}{row['p50_ms']:>10.2f}"
+              f"{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['max_ms']:>10.2f}", file=out)
+    print("-" * 72, file=out)
+    print(f"{sessions} sessions in {elapsed:.1f}s ({sessions / elapsed if elapsed else 0:.1f} sessions/s), "
+          f"{len(errors)} errors", file=out)
+    for error in errors[:10]:
+        print(f"   ❌ {error}", file=out)
+
+
+def parse_thresholds(values):
+    thresholds = {}
+    for value in values or []:
+        stage, _, limit = value.partition('=')
+        thresholds[stage.strip()] = float(limit)
+    return thresholds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless latency benchmark for the adaptive survey")
+    parser.add_argument('--script', help="JSONL file of recorded sessions (default: synthetic sessions)")
+    parser.add_argument('--sessions', type=int, default=50, help="synthetic sessions to run (default 50)")
+    parser.add_argument('--rounds', type=int, default=2, help="concerns per synthetic session (default 2)")
+    parser.add_argument('--workers', type=int, default=4, help="concurrent survey instances (default 4)")
+    parser.add_argument('--mode', choices=('keywords', 'fulltext', 'blend'), default=None,
+                        help="search mode (default: SENATAI_SEARCH_MODE or keywords)")
+    parser.add_argument('--no-cache', action='store_true', help="disable the search result cache")
+    parser.add_argument('--user-id', type=int, default=1, help="senatair_id the answers are saved under")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help="also write the summary to this file")
+    parser.add_argument('--max-p95', action='append', metavar='STAGE=MS',
+                        help="exit with status 1 if a stage's p95 exceeds MS (repeatable)")
+    options = parser.parse_args(argv)
+    # Same scheme as the survey (epoch seconds), one id per replayed session
+    options.session_base = int(time.time())
+
+    rng = random.Random(options.seed)
+    scripts = load_sessions(options.script) if options.script else list(
+        synthetic_sessions(options.sessions, rng, options.rounds))
+
+    jobs = queue.Queue()
+    for number, script in enumerate(scripts):
+        jobs.put((number, script))
+
+    # Each survey holds one connection for its lifetime and flushes on another
+    os.environ.setdefault('SENATAI_DB_POOL_MAX', str(options.workers * 2 + 1))
+
+    timings = StageTimings()
+    errors = []
+    journal_dir = tempfile.mkdtemp(prefix='senatai_benchmark_')
+
+    print(f"🚀 Replaying {len(scripts)} sessions on {options.workers} workers ...")
+    started = time.perf_counter()
+    # The survey's own output is not part of the measurement
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        workers = [
+            threading.Thread(target=run_worker, args=(i, jobs, timings, options, journal_dir, errors))
+            for i in range(options.workers)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    elapsed = time.perf_counter() - started
+
+    summary = timings.summary()
+    print_report(summary, elapsed, len(scripts), errors)
+
+    if options.json:
+        with open(options.json, 'w', encoding='utf-8') as f:
+            json.dump({'sessions': len(scripts), 'workers': options.workers, 'elapsed_s': elapsed,
+                       'mode': options.mode, 'no_cache': options.no_cache, 'errors': errors,
+                       'stages': summary}, f, indent=2)
+        print(f"📄 Summary written to {options.json}")
+
+    failed = [
+        f"{stage} p95 {summary[stage]['p95_ms']:.1f} ms > {limit:.1f} ms"
+        for stage, limit in parse_thresholds(options.max_p95).items()
+        if stage in summary and summary[stage]['p95_ms'] > limit
+    ]
+    for failure in failed:
+        print(f"❌ Regression: {failure}")
+    return 1 if failed or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+# test_bill_keyword_matrix.py
+# Checks that BillKeywordMatrix.stance_scores matches PersonalizedPredictor.predict_bill_stance
+# bill by bill, for matrices built from rows and from a published keyword index. No database needed.
+import os
+import random
+import shutil
+import sys
+import tempfile
+from collections import defaultdict
+
+import keyword_index
+from bill_keyword_matrix import BillKeywordMatrix
+from personalized_predictor3 import PersonalizedPredictor
+
+
+def check(passed, message):
+    if passed:
+        print(f"✅ TEST PASSED: {message}")
+    else:
+        print(f"❌ TEST FAILED: {message}")
+        sys.exit(1)
+
+
+def predictor_for(keyword_sentiment):
+    """PersonalizedPredictor with a given sentiment profile and no DB connection."""
+    predictor = PersonalizedPredictor.__new__(PersonalizedPredictor)
+    predictor.user_id = 999
+    predictor.db_conn = None
+    predictor.keyword_sentiment = defaultdict(lambda: [0, 0], keyword_sentiment)
+    return predictor
+
+
+rng = random.Random(1234)
+vocabulary = [f'word{i}' for i in range(40)]
+
+# bill -> keyword list, repeats included (one entry per bill_keywords row)
+bill_keywords = {}
+for b in range(60):
+    bill_keywords[f'C-{b}'] = [rng.choice(vocabulary) for _ in range(rng.randint(0, 12))]
+bill_keywords['C-none'] = ['unrelated', 'unrelated']
+
+# {'keyword': [count, score_sum]}; zero-count and unknown keywords must be ignored
+keyword_sentiment = {}
+for keyword in rng.sample(vocabulary, 15):
+    count = rng.randint(1, 6)
+    keyword_sentiment[keyword] = [count, sum(rng.randint(1, 5) for _ in range(count))]
+keyword_sentiment[vocabulary[-1]] = [0, 0]
+keyword_sentiment['never_in_a_bill'] = [3, 12]
+
+predictor = predictor_for(keyword_sentiment)
+final_sentiments = predictor.calculate_average_sentiments()
+expected = {bill: predictor.predict_bill_stance(keywords, final_sentiments)[0] for bill, keywords in bill_keywords.items()}
+
+rows = defaultdict(int)
+for bill, keywords in bill_keywords.items():
+    for keyword in keywords:
+        rows[(keyword, bill)] += 1
+rows = [(keyword, bill, multiplicity) for (keyword, bill), multiplicity in rows.items()]
+
+
+def compare(matrix, label):
+    scores, weights = matrix.stance_scores(predictor.keyword_sentiment)
+    got = dict(zip(matrix.bill_numbers, scores))
+    mismatches = [bill for bill in got if abs(got[bill] - expected[bill]) > 1e-9]
+    check(not mismatches, f"{label}: {len(got)} bill scores match predict_bill_stance"
+                          + (f" (mismatched: {mismatches[:3]})" if mismatches else ""))
+    check(got['C-none'] == 3.0 and weights[matrix.bill_numbers.index('C-none')] == 0,
+          f"{label}: bill with no shared keyword is neutral with weight 0")
+
+
+# --- Test 1: Matrix built from bill_keywords rows ---
+print("\n--- Running Test 1: Matrix from rows ---")
+matrix = BillKeywordMatrix.from_rows(rows)
+compare(matrix, "from_rows")
+
+# --- Test 2: Matrix over a published keyword index ---
+print("\n--- Running Test 2: Matrix from the keyword index ---")
+workdir = tempfile.mkdtemp(prefix='senatai_matrix_')
+try:
+    path = os.path.join(workdir, 'keyword_index.bin')
+    keyword_index.write_index([(keyword, bill, 1.0, multiplicity) for keyword, bill, multiplicity in rows], path)
+    compare(BillKeywordMatrix.from_keyword_index(keyword_index.KeywordIndex(path)), "from_keyword_index")
+finally:
+    shutil.rmtree(workdir)
+
+# --- Test 3: rank_all_bills ordering ---
+print("\n--- Running Test 3: rank_all_bills ---")
+ranked = predictor.rank_all_bills(matrix)
+check(len(ranked) == matrix.n_bills, "every bill ranked once")
+with_data = [bill for bill in ranked if bill['weight'] > 0]
+without_data = ranked[len(with_data):]
+check(all(bill['weight'] == 0 for bill in without_data), "bills without matching sentiment come last")
+check(all(a['score'] >= b['score'] for a, b in zip(with_data, with_data[1:])), "bills with data sorted by score")
+
+print("\n🎉 All bill keyword matrix tests passed.")
@@ -0,0 +1,76 @@
+# test_keyword_index.py
+# Checks keyword_index.py against small hand-built indexes; no database needed.
+import os
+import shutil
+import sys
+import tempfile
+
+import keyword_index
+
+
+def check(passed, message):
+    if passed:
+        print(f"✅ TEST PASSED: {message}")
+    else:
+        print(f"❌ TEST FAILED: {message}")
+        sys.exit(1)
+
+
+workdir = tempfile.mkdtemp(prefix='senatai_keyword_index_')
+path = os.path.join(workdir, 'keyword_index.bin')
+
+try:
+    # --- Test 1: Ranking order ---
+    print("\n--- Running Test 1: Ranking order ---")
+    # (keyword, bill_number, relevance_sum, row_count)
+    result = keyword_index.write_index([
+        ('housing', 'C-10', 3.0, 2),
+        ('housing', 'C-20', 1.0, 1),
+        ('rent', 'C-20', 2.0, 1),       # C-20 totals 3.0 over 2 rows, ties C-10 on both
+        ('rent', 'C-30', 2.5, 4),       # C-30 ties on relevance too, but over 5 rows
+        ('childcare', 'C-40', 9.0, 1),  # not queried below
+        ('rent', 'C-30', 0.5, 1),       # repeated (term, bill) pairs are summed
+    ], path)
+    check(result == {'terms': 3, 'bills': 4, 'postings': 5}, f"write_index reports terms/bills/postings ({result})")
+
+    index = keyword_index.KeywordIndex(path, check_interval=0)
+    ranked = index.top_k(['housing', 'rent', 'rent', 'missing'], 6)
+    check([bill for bill, _, _ in ranked] == ['C-30', 'C-10', 'C-20'],
+          f"bills ranked by relevance sum, then row count, then first seen ({ranked})")
+    check(ranked[0][1:] == (5, 3.0), "match_count and relevance summed per bill")
+    check([bill for bill, _, _ in index.top_k(['housing', 'rent'], 2)] == ['C-30', 'C-10'], "top_k stops at k")
+    check(index.top_k(['missing']) == [], "unknown keywords match nothing")
+
+    # --- Test 2: Query words onto the lemma vocabulary ---
+    print("\n--- Running Test 2: Query words onto the lemma vocabulary ---")
+    words = keyword_index.query_keywords("Rents and HOUSING costs, plus the tax")
+    check(words == ['rents', 'housing', 'costs', 'plus'], f"query_keywords lowercases and drops short words ({words})")
+    check(index.match_terms(words) == ['rent', 'housing'], "match_terms resolves plurals and drops unknown words")
+    check(keyword_index.word_forms('policies')[:2] == ['policies', 'policy'], "word_forms guesses -ies plurals")
+
+    # --- Test 3: Empty index ---
+    print("\n--- Running Test 3: Empty index ---")
+    empty_path = os.path.join(workdir, 'empty.bin')
+    check(keyword_index.write_index([], empty_path) == {'terms': 0, 'bills': 0, 'postings': 0}, "empty index written")
+    empty = keyword_index.KeywordIndex(empty_path)
+    check(empty.top_k(['housing']) == [] and empty.match_terms(['housing']) == [], "empty index matches nothing")
+
+    # --- Test 4: Republishing ---
+    print("\n--- Running Test 4: Republishing ---")
+    old_version = index.version
+    keyword_index.write_index([('housing', 'C-99', 1.0, 1)], path)
+    check(not any(name.startswith('keyword_index.bin.tmp') for name in os.listdir(workdir)), "no temp file left behind")
+    check(index.version != old_version, "open index notices the new file")
+    check(index.top_k(['housing', 'rent']) == [('C-99', 1, 1.0)], "open index ranks against the new file")
+
+    # --- Test 5: Lazy opening ---
+    print("\n--- Running Test 5: Lazy opening ---")
+    late_path = os.path.join(workdir, 'late.bin')
+    lazy = keyword_index.LazyIndex(late_path, retry_interval=0)
+    check(lazy.get() is None, "LazyIndex returns None before anything is published")
+    keyword_index.write_index([('rent', 'C-1', 1.0, 1)], late_path)
+    check(lazy.get() is not None and lazy.get().top_k(['rent']) == [('C-1', 1, 1.0)], "LazyIndex picks up a late publish")
+finally:
+    shutil.rmtree(workdir)
+
+print("\n🎉 All keyword index tests passed.")
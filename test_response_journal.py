@@ -0,0 +1,126 @@
+# test_response_journal.py
+# Checks ResponseJournal's per-process files and orphan replay against an
+# in-memory stand-in for db_pool.transaction; no database needed.
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import psycopg2
+
+from response_journal import RESPONSE_COLUMNS, ResponseJournal
+
+
+def check(passed, message):
+    if passed:
+        print(f"✅ TEST PASSED: {message}")
+    else:
+        print(f"❌ TEST FAILED: {message}")
+        sys.exit(1)
+
+
+class FakeCursor:
+    """Just enough cursor for psycopg2.extras.execute_values."""
+
+    def __init__(self, db):
+        self.db = db
+        self.connection = db
+
+    def mogrify(self, template, args):
+        if len(args) == len(RESPONSE_COLUMNS):
+            self.db.journal_ids.append(args[0])
+        return b'(%s)'
+
+    def execute(self, sql, args=None):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    encoding = 'UTF8'
+
+    def __init__(self):
+        self.journal_ids = []
+        self.down = False
+
+    @contextmanager
+    def transaction(self):
+        if self.down:
+            raise psycopg2.OperationalError("database is down")
+        yield self
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+def answer(n):
+    return {
+        'journal_id': f'answer-{n}', 'senatair_id': 1, 'session_id': 42,
+        'question_text': 'Q?', 'answer_text': '1', 'bill_number': 'C-1',
+        'question_type': 'test_type', 'keywords': ['test'], 'is_meta': False
+    }
+
+
+def write_orphan(journal_dir, name, records, torn_tail=False):
+    path = os.path.join(journal_dir, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+        if torn_tail:
+            f.write('{"journal_id": "torn')
+    return path
+
+
+journal_dir = tempfile.mkdtemp(prefix='senatai_journal_')
+db = FakeDatabase()
+
+try:
+    # --- Test 1: Orphans of dead processes are replayed ---
+    print("\n--- Running Test 1: Orphan replay ---")
+    orphan = write_orphan(journal_dir, 'response_journal.111.dead.jsonl', [answer(1), answer(2)], torn_tail=True)
+    first = ResponseJournal(db.transaction, max_batch=100, max_age=3600, journal_dir=journal_dir)
+    check(sorted(db.journal_ids) == ['answer-1', 'answer-2'], "orphaned answers written (torn last line skipped)")
+    check(not os.path.exists(orphan), "replayed orphan deleted")
+    check(os.path.basename(first.path).startswith('response_journal.'), "new journal gets its own file")
+
+    # --- Test 2: A live process's journal is left alone ---
+    print("\n--- Running Test 2: Live journals are not replayed ---")
+    first.append(answer(3))
+    db.journal_ids.clear()
+    second = ResponseJournal(db.transaction, max_batch=100, max_age=3600, journal_dir=journal_dir)
+    check(db.journal_ids == [], "a running journal's file is not replayed")
+    check(first.path != second.path, "each journal writes its own file")
+
+    second.append(answer(4))
+    check(second.flush() and db.journal_ids == ['answer-4'], "flush writes only this journal's answers")
+    with open(first.path, encoding='utf-8') as f:
+        check(len(f.readlines()) == 1, "another journal's flush leaves this file intact")
+
+    # --- Test 3: Failed writes stay on disk ---
+    print("\n--- Running Test 3: Database unavailable ---")
+    db.down = True
+    check(first.flush() is False, "flush reports the failure")
+    orphan = write_orphan(journal_dir, 'response_journal.222.dead.jsonl', [answer(5)])
+    third = ResponseJournal(db.transaction, max_batch=100, max_age=3600, journal_dir=journal_dir)
+    check(os.path.exists(orphan), "orphan kept while the database is down")
+    db.down = False
+
+    db.journal_ids.clear()
+    check(first.flush() and db.journal_ids == ['answer-3'], "buffered answers written once the database is back")
+    check(third.replay() == 1 and not os.path.exists(orphan), "kept orphan replayed on the next attempt")
+
+    # --- Test 4: Clean shutdown ---
+    print("\n--- Running Test 4: Clean shutdown ---")
+    for journal in (first, second, third):
+        journal.close()
+    check(glob.glob(os.path.join(journal_dir, '*')) + glob.glob(os.path.join(journal_dir, '.*')) == [],
+          "closed journals remove their files")
+finally:
+    shutil.rmtree(journal_dir)
+
+print("\n🎉 All response journal tests passed.")
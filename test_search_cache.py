@@ -0,0 +1,85 @@
+# test_search_cache.py
+# Checks search_cache.SearchCache expiry, LRU eviction and version invalidation.
+import sys
+import time
+
+import search_cache
+from search_cache import SearchCache, normalize_keywords
+
+
+def check(passed, message):
+    if passed:
+        print(f"✅ TEST PASSED: {message}")
+    else:
+        print(f"❌ TEST FAILED: {message}")
+        sys.exit(1)
+
+
+class FakeClock:
+    """Stands in for time.monotonic so TTLs can be stepped through instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+clock = FakeClock()
+search_cache.time = clock
+
+# --- Test 1: Normalized keys ---
+print("\n--- Running Test 1: Normalized keys ---")
+check(normalize_keywords(['Rent', 'too', 'high ']) == normalize_keywords(['high', 'rent', 'too', 'rent']),
+      "order, case, whitespace and duplicates do not change the key")
+check(normalize_keywords(['', '  ', None]) == (), "blank keywords are dropped")
+
+# --- Test 2: TTL ---
+print("\n--- Running Test 2: TTL ---")
+cache = SearchCache(maxsize=10, ttl=60)
+cache.put(('rent',), ['C-1'])
+clock.now += 59
+check(cache.get(('rent',)) == ['C-1'], "entry served before the TTL")
+clock.now += 2
+check(cache.get(('rent',)) is None, "entry expired after the TTL")
+check(cache.stats()['size'] == 0, "expired entry removed")
+
+# --- Test 3: LRU eviction ---
+print("\n--- Running Test 3: LRU eviction ---")
+cache = SearchCache(maxsize=2, ttl=60)
+cache.put(('a',), 1)
+cache.put(('b',), 2)
+cache.get(('a',))  # 'b' is now least recently used
+cache.put(('c',), 3)
+check(cache.get(('b',)) is None, "least recently used entry evicted")
+check(cache.get(('a',)) == 1 and cache.get(('c',)) == 3, "recently used entries kept")
+check(cache.stats()['evictions'] == 1, "eviction counted")
+
+# --- Test 4: Version invalidation ---
+print("\n--- Running Test 4: Version invalidation ---")
+version = [1]
+calls = []
+
+
+def version_source():
+    calls.append(clock.now)
+    return version[0]
+
+
+cache = SearchCache(maxsize=10, ttl=600, version_source=version_source, version_check_interval=5)
+cache.put(('rent',), ['C-1'])
+check(cache.get(('rent',)) == ['C-1'], "entry served while the version is unchanged")
+version[0] = 2
+clock.now += 1
+check(cache.get(('rent',)) == ['C-1'] and len(calls) == 1, "version polled at most once per interval")
+clock.now += 5
+check(cache.get(('rent',)) is None, "version change drops the cache")
+check(cache.stats()['invalidations'] == 1, "invalidation counted")
+
+cache.put(('rent',), ['C-2'])
+version[0] = None
+clock.now += 5
+check(cache.get(('rent',)) == ['C-2'], "unknown version (None) keeps the cache")
+
+search_cache.time = time
+print("\n🎉 All search cache tests passed.")
@@ -0,0 +1,56 @@
+# test_topic_matcher.py
+# Checks the persistent node's topic_matcher.BillCategoryIndex against the
+# match_bills_to_complaint scan it replaced. Run from the repository root:
+#   PYTHONPATH=nodes_from_replit/senatai-persistent-node python test_topic_matcher.py
+import random
+import sys
+
+import topic_matcher
+from topic_matcher import BillCategoryIndex, extract_topics_from_text, match_bills_to_complaint
+
+
+def check(passed, message):
+    if passed:
+        print(f"✅ TEST PASSED: {message}")
+    else:
+        print(f"❌ TEST FAILED: {message}")
+        sys.exit(1)
+
+
+rng = random.Random(2024)
+categories = list(topic_matcher.TOPIC_KEYWORDS) + [None, '']
+bills = [{'bill_id': f'C-{i}', 'category': rng.choice(categories)} for i in range(200)]
+index = BillCategoryIndex((bill['bill_id'], bill['category']) for bill in bills)
+
+complaints = [
+    "Rent is too high and my landlord won't fix anything",
+    "Carbon tax and gas prices are killing rural families",
+    "The hospital wait for my child was nine hours",
+    "Nothing works and nobody listens",
+    "",
+] + [
+    ' '.join(rng.sample([keyword for keywords in topic_matcher.TOPIC_KEYWORDS.values() for keyword in keywords], 3))
+    for _ in range(50)
+]
+
+# --- Test 1: Same matches as the full scan ---
+print("\n--- Running Test 1: Index vs. full scan ---")
+mismatches = [text for text in complaints
+              if index.match(extract_topics_from_text(text)) != match_bills_to_complaint(text, bills)]
+check(not mismatches, f"{len(complaints)} complaints match the same bills in the same order"
+                      + (f" (first mismatch: {mismatches[0]!r})" if mismatches else ""))
+
+# --- Test 2: Uncategorized bills ---
+print("\n--- Running Test 2: Uncategorized bills ---")
+uncategorized = [bill['bill_id'] for bill in bills if bill['category'] in (None, '', 'Other')]
+check(index.match(['Other']) == uncategorized, "bills without a category are filed under 'Other'")
+
+# --- Test 3: Fallback and edge cases ---
+print("\n--- Running Test 3: Fallback and edge cases ---")
+check(BillCategoryIndex([('C-1', 'Housing'), ('C-2', 'Economy')]).match(['Justice']) == ['C-1', 'C-2'],
+      "no matching category falls back to the first bills")
+check(index.match(['Justice']) is not index.match(['Justice']), "callers get their own list")
+check(len(BillCategoryIndex([('C-1', 'Housing'), ('C-1', 'Economy')])) == 1, "repeated bill_ids indexed once")
+check(BillCategoryIndex([]).match(['Housing']) == [] == match_bills_to_complaint('rent', []), "empty index matches nothing")
+
+print("\n🎉 All topic matcher tests passed.")